@@ -0,0 +1,517 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from time import sleep, monotonic
+
+from selenium.webdriver.common.by import By
+
+from perfil import perfil, etapa
+from jornada import SOLICITADO, GERADO
+from downloads import precisa_navegador, normalizar_url
+from prontidao import HistoricoProntidao, Prontidao, proxima_verificacao
+from esperas import aguardar_pagina, aguardar_ocioso, aguardar_clicavel, aguardar_modal_fechado, instalar_monitor_rede
+from navegador import bloquear_recursos
+from nucleo_cdp import ClienteCDP, endereco_depuracao
+from api_relatorios import CapturaAPI, consultar
+
+# Agendador: solicita todos os relatórios primeiro (uma aba por relatório),
+# depois acompanha todas as abas ao mesmo tempo e baixa cada relatório assim que fica pronto.
+# Relatório de hoje que já está pronto na lista do MyRP é baixado direto, sem gerar outro.
+
+XPATH_REFRESH = "//i[contains(@class, 'material-icons') and text()='refresh']"
+XPATH_REMOVER = "//a[contains(@class, 'upper') and contains(@class, '_mlxs') and text()='Remover']"
+XPATH_CONFIRMAR_REMOVER = "//button[contains(@class, 'btn orange') and text()='REMOVER']"
+
+# Percorre a página uma única vez: cada link do blob pertence à data (<p>) mais próxima antes dele
+SCRIPT_LISTAR_RELATORIOS = r"""
+var padraoData = /\d{2}\/\d{2}\/\d{4}/;
+var percurso = document.createTreeWalker(document.body, NodeFilter.SHOW_ELEMENT);
+var ultimoP = null;
+var entradas = [];
+while (percurso.nextNode()) {
+    var no = percurso.currentNode;
+    if (no.tagName === 'P' && padraoData.test(no.textContent)) {
+        ultimoP = no;
+    } else if (no.tagName === 'A' && no.href && no.href.indexOf('blob.core.windows.net/relatorios') !== -1) {
+        if (!ultimoP || !no.offsetParent) { continue; }
+        var bloco = no.parentElement;
+        while (bloco && !bloco.contains(ultimoP)) { bloco = bloco.parentElement; }
+        entradas.push({data: ultimoP.textContent.trim(), href: no.href, texto: bloco ? bloco.innerText : ''});
+    }
+}
+return entradas;
+"""
+
+
+# Limpeza inteira numa única chamada: o próprio script clica em "Remover", confirma e espera
+# a entrada sumir da lista (e a rede ficar ociosa) antes da próxima. Para quando não há mais
+# o que remover, sem esperar timeout. Devolve quantos removeu.
+SCRIPT_REMOVER_EM_LOTE = r"""
+var limite = arguments[0], xpathRemover = arguments[1], xpathConfirmar = arguments[2];
+var concluir = arguments[arguments.length - 1];
+var removidos = 0;
+function achar(xpath) {
+    return document.evaluate(xpath, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+}
+function visivel(el) { return !!el && document.body.contains(el) && el.offsetParent !== null; }
+function ocioso() {
+    var pendentes = window.__myrpPendentes || 0;
+    if (window.jQuery) { pendentes += window.jQuery.active; }
+    return pendentes <= 0;
+}
+function esperar(condicao, limiteMs, seguir) {
+    var inicio = Date.now();
+    (function checar() {
+        var valor = condicao();
+        if (valor) { seguir(valor); }
+        else if (Date.now() - inicio > limiteMs) { seguir(null); }
+        else { setTimeout(checar, 50); }
+    })();
+}
+function proximo() {
+    var remover = achar(xpathRemover);
+    if (removidos >= limite || !visivel(remover)) { return concluir(removidos); }
+    remover.click();
+    esperar(function () { var b = achar(xpathConfirmar); return visivel(b) ? b : null; }, 5000, function (confirmar) {
+        if (!confirmar) { return concluir(removidos); }
+        confirmar.click();
+        esperar(function () { return !visivel(remover) && !visivel(achar(xpathConfirmar)) && ocioso(); }, 10000, function (ok) {
+            if (!ok) { return concluir(removidos); }
+            removidos++;
+            proximo();
+        });
+    });
+}
+proximo();
+"""
+
+
+def _normalizar(entradas):
+    # Links na mesma forma dos que vêm do endpoint da lista (api_relatorios)
+    for entrada in entradas:
+        entrada["href"] = normalizar_url(entrada["href"])
+    return entradas
+
+
+def listar_relatorios(driver):
+    return _normalizar(driver.execute_script(SCRIPT_LISTAR_RELATORIOS) or [])
+
+
+def _escolher_entrada(entradas, tarefa, data_hoje, reivindicados, pendentes=()):
+    # Relatórios da mesma lista são separados pelos links já existentes antes da solicitação
+    # e pelos trechos de texto esperados (assinatura), que precisam aparecer todos: vários
+    # relatórios (venda, analítico...) dividem a mesma lista. Só quando nenhum outro pedido
+    # pendente usa a lista vale a melhor entrada nova, mesmo sem a assinatura completa
+    candidatos = [
+        e for e in entradas
+        if data_hoje in e["data"] and e["href"] not in tarefa["conhecidos"] and e["href"] not in reivindicados
+    ]
+    if not candidatos:
+        return None
+    assinatura = [a.lower() for a in tarefa.get("assinatura", ())]
+
+    def pontos(entrada):
+        return sum(1 for a in assinatura if a in entrada["texto"].lower())
+
+    completos = [e for e in candidatos if pontos(e) == len(assinatura)]
+    if completos:
+        return completos[0]
+    if any(t is not tarefa and t["url"] == tarefa["url"] for t in pendentes):
+        return None
+    return max(candidatos, key=pontos)
+
+
+def _pronto_na_lista(entradas, tarefa, data_hoje, reivindicados):
+    # Relatório de hoje já pronto na lista e com todos os trechos da assinatura (mesmo tipo e
+    # período): vale tanto quanto um gerado agora, como na regra "já gerado hoje" do manifesto.
+    # Sem assinatura (estoque) nada identifica o relatório, e no modo em lote a entrada precisa
+    # citar a loja: o de outra empresa gerado hoje não serve
+    assinatura = [a.lower() for a in tarefa.get("assinatura", ())]
+    if not assinatura:
+        return None
+    if tarefa.get("empresa"):
+        assinatura.append(tarefa["empresa"].lower())
+    for e in entradas:
+        if data_hoje in e["data"] and e["href"] not in reivindicados and all(a in e["texto"].lower() for a in assinatura):
+            return e
+    return None
+
+
+def _ler_lista(driver, tarefa):
+    # Uma leitura da lista pelo Selenium; erro de leitura vale como lista vazia nesta verificação
+    driver.switch_to.window(tarefa["aba"])
+    try:
+        return listar_relatorios(driver)
+    except Exception as e:
+        print(f"{tarefa['chave']} - Erro ao ler lista de relatórios: {e}")
+        return []
+
+
+def _clicar_refresh(driver):
+    try:
+        driver.find_element(By.XPATH, XPATH_REFRESH).click()
+    except Exception as e:
+        print(f"Refresh: Erro ao clicar - {e}")
+
+
+def _baixar(tarefa, url, salvar="salvar"):
+    with etapa(tarefa["chave"], "download") as registro:
+        tarefa[salvar](url)
+    return registro["parede"]
+
+
+def remover_relatorios_antigos(driver, quantidade, status, relatorio):
+    try:
+        # Pior caso: 5 s pela confirmação + 10 s pela remoção de cada entrada
+        driver.set_script_timeout(5 + quantidade * 15)
+        removidos = driver.execute_async_script(SCRIPT_REMOVER_EM_LOTE, quantidade, XPATH_REMOVER, XPATH_CONFIRMAR_REMOVER)
+        status.ok(relatorio, "remover_antigos", f"{removidos} removidos")
+        return removidos
+    except Exception as e:
+        status.aviso(relatorio, "remover_antigos", e, "remoção em lote falhou, removendo um a um")
+    return _remover_um_a_um(driver, quantidade, status, relatorio)
+
+
+def _remover_um_a_um(driver, quantidade, status, relatorio):
+    removidos = 0
+    try:
+        for _ in range(quantidade):
+            # Sempre busca o primeiro "Remover" disponível
+            remover = aguardar_clicavel(driver, By.XPATH, XPATH_REMOVER, timeout=5)
+            remover.click()
+            confirmar = aguardar_clicavel(driver, By.XPATH, XPATH_CONFIRMAR_REMOVER, timeout=5)
+            confirmar.click()
+            aguardar_modal_fechado(driver, By.XPATH, XPATH_CONFIRMAR_REMOVER)
+            aguardar_ocioso(driver)
+            removidos += 1
+        status.ok(relatorio, "remover_antigos", f"{removidos} removidos")
+    except Exception as e:
+        # Menos relatórios antigos do que o limite é o caso normal, não um erro
+        status.aviso(relatorio, "remover_antigos", e, f"{removidos} removidos")
+    return removidos
+
+
+async def _acompanhar_aba(cliente, tarefa, pendentes, data_hoje, reivindicados, encontrado, vencido, *, sessao=None, api=None):
+    # Mesmo ciclo do acompanhamento pelo Selenium, só que numa sessão CDP da própria aba:
+    # as abas são lidas ao mesmo tempo e a espera depois do refresh é pelos eventos de rede.
+    # Com o endpoint da lista conhecido (api), a verificação é uma chamada HTTP com os cookies
+    # da sessão, sem refresh nem DOM; cliente None = só pelo endpoint
+    aba = await cliente.anexar(tarefa["aba"]) if cliente is not None else None
+    if aba is not None and api is not None:
+        CapturaAPI(aba, api, tarefa.get("empresa"), tarefa["url"])
+    prontidao = tarefa["prontidao"]
+    try:
+        while True:
+            espera = prontidao.proxima - monotonic()
+            if espera > 0:
+                await asyncio.sleep(espera)
+            chamada = api.chamada(tarefa.get("empresa"), tarefa["url"]) if api is not None and sessao is not None else None
+            entradas = None
+            pela_api = False
+            if chamada:
+                try:
+                    entradas = await asyncio.to_thread(consultar, sessao, chamada)
+                    pela_api = True
+                except Exception as e:
+                    print(f"{tarefa['chave']} - Endpoint da lista falhou ({e}); voltando para a página")
+                    api.esquecer(tarefa.get("empresa"), tarefa["url"])
+                    if aba is None:
+                        raise
+            if entradas is None:
+                try:
+                    entradas = _normalizar(await aba.avaliar(f"(function () {{{SCRIPT_LISTAR_RELATORIOS}}})()") or [])
+                except Exception as e:
+                    print(f"{tarefa['chave']} - Erro ao ler lista de relatórios: {e}")
+                    entradas = []
+            entrada = _escolher_entrada(entradas, tarefa, data_hoje, reivindicados, pendentes)
+            if entrada:
+                encontrado(tarefa, entrada)
+                return
+            if prontidao.vencida():
+                vencido(tarefa)
+                return
+            prontidao.nao_pronto()
+            if not pela_api:
+                if not await aba.clicar(XPATH_REFRESH):
+                    print("Refresh: ícone não encontrado")
+                await aba.aguardar_ocioso()
+    finally:
+        if aba is not None:
+            await aba.desanexar()
+
+
+async def _acompanhar_selenium(driver, reserva, pendentes, conferir, mudou, assincronas):
+    # Abas sem CDP nem endpoint (ou cujo acompanhamento assíncrono falhou) seguem pelo Selenium
+    # no mesmo laço: uma chamada ao driver de cada vez, numa thread, sem parar as outras abas
+    while True:
+        fila = [t for t in reserva if t in pendentes]
+        if not fila and all(a.done() for a in assincronas):
+            return
+        espera = proxima_verificacao([t["prontidao"] for t in fila]) - monotonic() if fila else None
+        if espera is None or espera > 0:
+            # Acorda antes se uma aba cair para cá ou o acompanhamento assíncrono terminar
+            mudou.clear()
+            try:
+                await asyncio.wait_for(mudou.wait(), espera)
+            except asyncio.TimeoutError:
+                pass
+            continue
+        agora = monotonic()
+        for tarefa in fila:
+            if tarefa in pendentes and tarefa["prontidao"].deve_verificar(agora):
+                entradas = await asyncio.to_thread(_ler_lista, driver, tarefa)
+                if conferir(tarefa, entradas):
+                    await asyncio.to_thread(_clicar_refresh, driver)
+
+
+async def _acompanhar_async(endereco, pendentes, data_hoje, reivindicados, encontrado, vencido, *, sessao=None, api=None, driver=None, conferir=None):
+    # driver/conferir: as abas que não saem do Selenium são acompanhadas junto, no mesmo laço
+    cliente = None
+    if endereco:
+        try:
+            cliente = await ClienteCDP.conectar(endereco)
+        except Exception as e:
+            print(f"Núcleo CDP indisponível: {type(e).__name__}: {e}")
+    # Sem o CDP, só as abas com endpoint conhecido saem do Selenium
+    tarefas = [
+        t for t in pendentes
+        if cliente is not None or (api is not None and sessao is not None and api.chamada(t.get("empresa"), t["url"]))
+    ]
+    reserva = [t for t in pendentes if t not in tarefas] if driver is not None else []
+    mudou = asyncio.Event()
+
+    async def acompanhar(tarefa):
+        try:
+            await _acompanhar_aba(cliente, tarefa, pendentes, data_hoje, reivindicados, encontrado, vencido, sessao=sessao, api=api)
+        except Exception as e:
+            if driver is None:
+                raise
+            print(f"{tarefa['chave']} - Acompanhamento assíncrono: {type(e).__name__}: {e}; seguindo pelo Selenium")
+            reserva.append(tarefa)
+        finally:
+            mudou.set()
+
+    try:
+        assincronas = [asyncio.ensure_future(acompanhar(t)) for t in tarefas]
+        selenium = [_acompanhar_selenium(driver, reserva, pendentes, conferir, mudou, assincronas)] if driver is not None else []
+        resultados = await asyncio.gather(*assincronas, *selenium, return_exceptions=True)
+    finally:
+        if cliente is not None:
+            await cliente.fechar()
+    # Abas que falharam continuam em "pendentes" e seguem pelo Selenium
+    for erro in resultados:
+        if isinstance(erro, BaseException):
+            print(f"Acompanhamento assíncrono: {type(erro).__name__}: {erro}")
+
+
+def _abrir_aba(driver, url, bloquear=False):
+    # O monitor de rede e o bloqueio de recursos valem por aba (alvo CDP): a aba nova abre em
+    # branco, recebe os dois e só então navega para a lista
+    driver.execute_script("window.open('about:blank', '_blank');")
+    driver.switch_to.window(driver.window_handles[-1])
+    instalar_monitor_rede(driver)
+    if bloquear:
+        bloquear_recursos(driver)
+    driver.get(url)
+    return driver.current_window_handle
+
+
+def gerar_em_paralelo(driver, tarefas, status, data_hoje, prazo, *, jornada=None, cdp=False, sessao=None, api=None, bloquear=False):
+    # tarefa: chave, nome, url, remover, solicitar(driver, status), salvar(url),
+    #         assinatura, período e, opcionalmente, prazo próprio (segundos) e empresa.
+    # Com jornada, cada relatório retoma do primeiro passo que faltou na execução anterior.
+    # cdp: acompanha as abas pelo núcleo assíncrono (nucleo_cdp); o Selenium fica de reserva.
+    # api: registro do endpoint da lista (api_relatorios), consultado com a sessão HTTP.
+    # bloquear: bloqueia imagens/fontes também nas abas novas (modo desacompanhado).
+    historico = HistoricoProntidao()
+    aba_principal = driver.current_window_handle
+    listas_limpas = set()
+    listas_lidas = set()
+    reivindicados = set()
+    pendentes = []
+    prontos = []
+    resultado = {}
+
+    def marcar(tarefa, etapa_jornada, **dados):
+        if jornada is not None:
+            jornada.marcar(tarefa["chave"], tarefa.get("periodo", ""), etapa_jornada, **dados)
+
+    def descartar(tarefa):
+        if jornada is not None:
+            jornada.descartar(tarefa["chave"])
+
+    for tarefa in tarefas:
+        tarefa["retomar"] = jornada.estado(tarefa["chave"], tarefa.get("periodo", "")) if jornada is not None else {}
+    # Lista com relatório já solicitado não é limpa: a limpeza poderia apagá-lo
+    listas_limpas.update(t["url"] for t in tarefas if SOLICITADO in t["retomar"])
+
+    def ja_pronto(tarefa, href, detalhe):
+        # Só falta baixar: nada de limpar a lista, solicitar ou acompanhar
+        tarefa["link_anterior"] = True
+        reivindicados.add(href)
+        status.ok(tarefa["chave"], "reaproveitar", detalhe)
+        prontos.append((tarefa, href))
+
+    # 1) Solicita todos os relatórios, cada um na sua aba
+    for tarefa in tarefas:
+        chave = tarefa["chave"]
+        if GERADO in tarefa["retomar"]:
+            # Já gerado no MyRP numa execução anterior
+            ja_pronto(tarefa, tarefa["retomar"][GERADO]["href"], "gerado na execução anterior")
+            continue
+        if tarefa.get("pronto_na_lista"):
+            ja_pronto(tarefa, tarefa["pronto_na_lista"], "já pronto na lista do MyRP")
+            continue
+        try:
+            with etapa(chave, "acessar_dashboard"):
+                tarefa["aba"] = _abrir_aba(driver, tarefa["url"], bloquear)
+                aguardar_pagina(driver, descricao=f"{chave} - página de relatórios")
+            status.ok(chave, "acessar_dashboard")
+        except Exception as e:
+            status.erro(chave, "acessar_dashboard", e)
+            continue
+
+        # Na primeira visita a cada lista, procura relatórios de hoje já prontos para todos
+        # os pedidos dela; lista com relatório reaproveitado não é limpa
+        if tarefa["url"] not in listas_lidas:
+            listas_lidas.add(tarefa["url"])
+            try:
+                entradas = listar_relatorios(driver)
+            except Exception as e:
+                print(f"{chave} - Erro ao ler lista de relatórios: {e}")
+                entradas = []
+            for outra in tarefas:
+                if outra["url"] != tarefa["url"] or outra["retomar"]:
+                    continue
+                entrada = _pronto_na_lista(entradas, outra, data_hoje, reivindicados)
+                if entrada:
+                    outra["pronto_na_lista"] = entrada["href"]
+                    reivindicados.add(entrada["href"])
+                    marcar(outra, GERADO, href=entrada["href"])
+                    listas_limpas.add(tarefa["url"])
+            if tarefa.get("pronto_na_lista"):
+                ja_pronto(tarefa, tarefa["pronto_na_lista"], "já pronto na lista do MyRP")
+                continue
+
+        # A limpeza roda uma vez por lista, antes de qualquer solicitação nela
+        if tarefa["url"] not in listas_limpas:
+            with etapa(chave, "remover_antigos"):
+                remover_relatorios_antigos(driver, max(t["remover"] for t in tarefas if t["url"] == tarefa["url"]), status, chave)
+            listas_limpas.add(tarefa["url"])
+
+        if SOLICITADO in tarefa["retomar"]:
+            # Já solicitado numa execução anterior: só acompanha, com os links de antes da solicitação
+            tarefa["conhecidos"] = set(tarefa["retomar"][SOLICITADO]["conhecidos"])
+            status.ok(chave, "retomar", "já solicitado no MyRP")
+            solicitado = True
+        else:
+            try:
+                tarefa["conhecidos"] = {e["href"] for e in listar_relatorios(driver)}
+            except Exception as e:
+                # Sem os links de antes não dá para separar o relatório novo dos antigos
+                status.erro(chave, "solicitar", e, "lista de relatórios ilegível")
+                continue
+            with etapa(chave, "solicitar"):
+                solicitado = tarefa["solicitar"](driver, status)
+            if solicitado:
+                marcar(tarefa, SOLICITADO, conhecidos=sorted(tarefa["conhecidos"]))
+        if solicitado:
+            tarefa["prontidao"] = Prontidao(tarefa["chave"], tarefa.get("prazo") or prazo, historico)
+            pendentes.append(tarefa)
+
+    # 2) Acompanha todas as abas ao mesmo tempo; cada relatório tem seu próprio backoff e prazo.
+    #    Os downloads rodam em paralelo ao acompanhamento.
+    downloads = {}
+    with ThreadPoolExecutor(max_workers=max(1, len(pendentes) + len(prontos))) as executor:
+        for tarefa, href in prontos:
+            tarefa["href"] = href
+            downloads[tarefa["chave"]] = (tarefa, executor.submit(_baixar, tarefa, href))
+
+        def encontrado(tarefa, entrada):
+            chave = tarefa["chave"]
+            prontidao = tarefa["prontidao"]
+            duracao = prontidao.pronto()
+            perfil.registrar(chave, "prontidao", duracao, duracao, prontidao.tentativas)
+            reivindicados.add(entrada["href"])
+            marcar(tarefa, GERADO, href=entrada["href"])
+            tarefa["href"] = entrada["href"]
+            status.ok(chave, "prontidao", f"{prontidao.tentativas} verificações", duracao=duracao)
+            downloads[chave] = (tarefa, executor.submit(_baixar, tarefa, entrada["href"]))
+            pendentes.remove(tarefa)
+
+        def vencido(tarefa):
+            chave = tarefa["chave"]
+            prontidao = tarefa["prontidao"]
+            duracao = monotonic() - prontidao.inicio
+            perfil.registrar(chave, "prontidao", duracao, duracao, prontidao.tentativas)
+            status.erro(chave, "prontidao", detalhe=f"não encontrado, prazo de {tarefa.get('prazo') or prazo}s esgotado")
+            # A solicitação não resultou em relatório: a próxima execução pede de novo
+            descartar(tarefa)
+            pendentes.remove(tarefa)
+
+        def conferir(tarefa, entradas):
+            # Uma verificação pelo Selenium; True = ainda não pronto, atualizar a lista
+            entrada = _escolher_entrada(entradas, tarefa, data_hoje, reivindicados, pendentes)
+            if entrada:
+                encontrado(tarefa, entrada)
+            elif tarefa["prontidao"].vencida():
+                vencido(tarefa)
+            else:
+                tarefa["prontidao"].nao_pronto()
+                return True
+            return False
+
+        endereco = endereco_depuracao(driver) if cdp else None
+        if pendentes and (endereco or (api is not None and sessao is not None)):
+            try:
+                asyncio.run(_acompanhar_async(
+                    endereco, pendentes, data_hoje, reivindicados, encontrado, vencido,
+                    sessao=sessao, api=api, driver=driver, conferir=conferir,
+                ))
+            except Exception as e:
+                status.aviso(None, "acompanhamento_assincrono", e, "acompanhando pelo Selenium")
+
+        while pendentes:
+            espera = proxima_verificacao([t["prontidao"] for t in pendentes]) - monotonic()
+            if espera > 0:
+                sleep(espera)
+            agora = monotonic()
+            for tarefa in list(pendentes):
+                if tarefa["prontidao"].deve_verificar(agora) and conferir(tarefa, _ler_lista(driver, tarefa)):
+                    _clicar_refresh(driver)
+
+        for chave, (tarefa, futuro) in downloads.items():
+            try:
+                try:
+                    duracao = futuro.result()
+                except Exception as e:
+                    # Link recusado para a sessão HTTP: baixa pelo navegador, aqui na thread
+                    # principal, já que o driver não é compartilhado com os downloads paralelos
+                    if not (tarefa.get("salvar_navegador") and precisa_navegador(e)):
+                        raise
+                    status.aviso(chave, "download", e, "tentando pelo navegador")
+                    duracao = _baixar(tarefa, tarefa["href"], "salvar_navegador")
+                status.ok(chave, "download", duracao=duracao)
+                status.ok(chave, "resultado", f"{tarefa['nome']} - ok")
+                resultado[chave] = "ok"
+            except Exception as e:
+                status.erro(chave, "download", e)
+                # Link anterior a esta solicitação que não baixa mais (expirado/removido): recomeça do zero
+                if tarefa.get("link_anterior"):
+                    descartar(tarefa)
+
+    try:
+        historico.salvar()
+    except OSError as e:
+        print(f"Erro ao salvar histórico de prontidão: {e}")
+
+    # Fecha as abas dos relatórios e volta para a aba principal
+    for tarefa in tarefas:
+        if tarefa.get("aba"):
+            try:
+                driver.switch_to.window(tarefa["aba"])
+                driver.close()
+            except Exception:
+                pass
+    driver.switch_to.window(aba_principal)
+    return resultado
+
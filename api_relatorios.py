@@ -0,0 +1,206 @@
+import asyncio
+import base64
+import json
+import os
+import re
+import threading
+import unicodedata
+from datetime import datetime
+
+from downloads import TIMEOUT_CONEXAO, normalizar_url
+
+# Chamada XHR/fetch que a página relatoriosAvancados faz para montar a lista de relatórios.
+# Enquanto o núcleo CDP acompanha uma aba, as respostas JSON da página são conferidas: a que
+# trouxer links do blob de relatórios é gravada (método, URL, corpo) por empresa e página de
+# relatórios: a mesma página devolve a lista da empresa selecionada na sessão.
+# Nas próximas verificações (e execuções) a prontidão é consultada direto nesse endpoint, com
+# os cookies da sessão HTTP, sem refresh nem leitura do DOM. Se o endpoint falhar, ele é
+# esquecido e a aba volta para o acompanhamento pela página (e é capturado de novo).
+
+ARQUIVO_API = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".api_relatorios.json")
+
+MARCA_RELATORIO = "blob.core.windows.net/relatorios"
+TIMEOUT_CONSULTA = 15
+# Cabeçalhos da requisição original que o endpoint pode exigir (os cookies vêm da sessão).
+# Os de credencial (token CSRF/bearer) ficam só em memória, valendo para a execução que os
+# capturou; nunca vão para o arquivo
+CABECALHOS_COPIADOS = ("accept", "content-type", "x-requested-with")
+CABECALHOS_CREDENCIAIS = ("requestverificationtoken", "authorization")
+CAMPOS_STATUS = ("status", "situacao", "situação", "estado")
+# Status (sem acento, minúsculo) de relatório terminado; com outro status em texto
+# ("Processando", "Na fila", "Erro") o link ainda não serve, mesmo já estando na lista
+STATUS_PRONTOS = ("conclu", "finaliz", "pront", "dispon", "gerad", "sucesso", "complet", "done", "ready", "success", "finish")
+# Campos com a data de geração; o nome do relatório também pode ter datas (ex.: 01/01/2026)
+CAMPOS_DATA = ("data", "date", "criad", "created", "gerad", "emiss")
+
+_DATA_BR = re.compile(r"\d{2}/\d{2}/\d{4}")
+_DATA_ISO = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+
+class RegistroAPI:
+    # Chamadas por empresa e página; empresa None = empresa_padrao (a principal)
+    def __init__(self, caminho=ARQUIVO_API, empresa_padrao=""):
+        self.caminho = caminho
+        self.empresa_padrao = empresa_padrao
+        self.trava = threading.Lock()
+        try:
+            with open(caminho, encoding="utf-8") as f:
+                self.chamadas = json.load(f)
+        except (OSError, ValueError):
+            self.chamadas = {}
+        self.credenciais = {}
+
+    def _chave(self, empresa):
+        return empresa or self.empresa_padrao
+
+    def _gravar(self):
+        # Mesmo cuidado da sessão em cache: só o usuário lê
+        temporario = self.caminho + ".tmp"
+        fd = os.open(temporario, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(self.chamadas, f, ensure_ascii=False, indent=2)
+        os.replace(temporario, self.caminho)
+
+    def chamada(self, empresa, pagina):
+        chave = self._chave(empresa)
+        with self.trava:
+            chamada = (self.chamadas.get(chave) or {}).get(pagina)
+            if not isinstance(chamada, dict):
+                return None
+            return dict(chamada, cabecalhos=dict(chamada.get("cabecalhos") or {}, **self.credenciais.get((chave, pagina), {})))
+
+    def gravar(self, empresa, pagina, chamada):
+        cabecalhos = chamada.get("cabecalhos") or {}
+        credenciais = {k: v for k, v in cabecalhos.items() if k.lower() in CABECALHOS_CREDENCIAIS}
+        chamada = dict(chamada, cabecalhos={k: v for k, v in cabecalhos.items() if k.lower() not in CABECALHOS_CREDENCIAIS})
+        # Corpo com token de formulário (__RequestVerificationToken) também é credencial:
+        # a chamada inteira vale só para esta execução
+        persistir = "requestverificationtoken" not in (chamada.get("corpo") or "").lower()
+        chave = self._chave(empresa)
+        with self.trava:
+            self.credenciais[(chave, pagina)] = credenciais
+            paginas = self.chamadas.setdefault(chave, {})
+            if paginas.get(pagina) == chamada:
+                return
+            paginas[pagina] = chamada
+            if persistir:
+                self._gravar()
+        print(f"[api] {chave} - {pagina}: lista de relatórios em {chamada['metodo']} {chamada['url']}")
+
+    def esquecer(self, empresa, pagina):
+        chave = self._chave(empresa)
+        with self.trava:
+            self.credenciais.pop((chave, pagina), None)
+            if (self.chamadas.get(chave) or {}).pop(pagina, None) is not None:
+                self._gravar()
+
+
+def _data(objeto):
+    # Mesma forma da página (dd/mm/aaaa), para valer a comparação com data_hoje
+    campos = [str(v) for c, v in objeto.items() if isinstance(v, str) and any(p in c.lower() for p in CAMPOS_DATA)]
+    return _primeira_data(campos) or _primeira_data([v for v in objeto.values() if isinstance(v, str)])
+
+
+def _primeira_data(valores):
+    for valor in valores:
+        encontrado = _DATA_BR.search(valor)
+        if encontrado:
+            return encontrado.group()
+    for valor in valores:
+        encontrado = _DATA_ISO.search(valor)
+        if encontrado:
+            return datetime.strptime(encontrado.group(), "%Y-%m-%d").strftime("%d/%m/%Y")
+    return ""
+
+
+def pronta(entrada):
+    # Sem status, ou com status que não é texto (código numérico sem tradução), vale o link
+    status = entrada.get("status")
+    if not isinstance(status, str) or not status.strip():
+        return True
+    texto = unicodedata.normalize("NFKD", status).encode("ascii", "ignore").decode().strip().lower()
+    return texto.startswith(STATUS_PRONTOS)
+
+
+def extrair_entradas(dados):
+    # Cada objeto do JSON com um link do blob é um relatório: mesmo formato de listar_relatorios
+    # (data, href, texto), mais o status informado pelo MyRP quando houver
+    entradas = []
+    pilha = [dados]
+    while pilha:
+        atual = pilha.pop()
+        if isinstance(atual, list):
+            pilha.extend(reversed(atual))
+            continue
+        if not isinstance(atual, dict):
+            continue
+        textos = [str(v) for v in atual.values() if isinstance(v, (str, int, float)) and not isinstance(v, bool)]
+        href = next((t for t in textos if MARCA_RELATORIO in t), None)
+        if href:
+            status = next((atual[c] for c in atual if c.lower() in CAMPOS_STATUS), None)
+            entradas.append({"data": _data(atual), "href": normalizar_url(href), "texto": " ".join(textos), "status": status})
+        pilha.extend(reversed([v for v in atual.values() if isinstance(v, (dict, list))]))
+    return entradas
+
+
+def consultar(sessao, chamada, timeout=TIMEOUT_CONSULTA):
+    resposta = sessao.request(
+        chamada["metodo"], chamada["url"], data=chamada.get("corpo"), headers=chamada.get("cabecalhos"),
+        timeout=(TIMEOUT_CONEXAO, timeout),
+    )
+    resposta.raise_for_status()
+    # Relatório ainda em processamento já aparece na lista: só os terminados são candidatos
+    return [e for e in extrair_entradas(resposta.json()) if pronta(e)]
+
+
+class CapturaAPI:
+    # Ouve a rede de uma aba (sessão CDP) e grava a chamada que devolve a lista de relatórios
+    def __init__(self, aba, registro, empresa, pagina):
+        self.aba = aba
+        self.registro = registro
+        self.empresa = empresa
+        self.pagina = pagina
+        self.requisicoes = {}
+        self.respostas_json = {}
+        self.tarefas = set()
+        aba.cliente.ouvir("Network.requestWillBeSent", aba.sessao, self._requisicao)
+        aba.cliente.ouvir("Network.responseReceived", aba.sessao, self._resposta)
+        aba.cliente.ouvir("Network.loadingFinished", aba.sessao, self._fim)
+
+    def _requisicao(self, evento):
+        if evento.get("type") not in ("XHR", "Fetch"):
+            return
+        requisicao = evento["request"]
+        cabecalhos = {k: v for k, v in requisicao.get("headers", {}).items() if k.lower() in CABECALHOS_COPIADOS + CABECALHOS_CREDENCIAIS}
+        self.requisicoes[evento["requestId"]] = {
+            "metodo": requisicao.get("method", "GET"),
+            "url": requisicao["url"],
+            "corpo": requisicao.get("postData"),
+            "cabecalhos": cabecalhos,
+        }
+
+    def _resposta(self, evento):
+        chamada = self.requisicoes.pop(evento.get("requestId"), None)
+        if chamada is not None and "json" in evento.get("response", {}).get("mimeType", ""):
+            self.respostas_json[evento["requestId"]] = chamada
+
+    def _fim(self, evento):
+        # O corpo só pode ser pedido depois que a resposta terminou de chegar
+        chamada = self.respostas_json.pop(evento.get("requestId"), None)
+        if chamada is None:
+            return
+        tarefa = asyncio.get_running_loop().create_task(self._conferir(evento["requestId"], chamada))
+        self.tarefas.add(tarefa)
+        tarefa.add_done_callback(self.tarefas.discard)
+
+    async def _conferir(self, id_requisicao, chamada):
+        try:
+            resposta = await self.aba.enviar("Network.getResponseBody", {"requestId": id_requisicao})
+            corpo = resposta.get("body", "")
+            if resposta.get("base64Encoded"):
+                corpo = base64.b64decode(corpo).decode("utf-8", "replace")
+            dados = json.loads(corpo)
+        except Exception:
+            return
+        if extrair_entradas(dados):
+            self.registro.gravar(self.empresa, self.pagina, chamada)
@@ -0,0 +1,212 @@
+import argparse
+import os
+import sqlite3
+import threading
+from datetime import date, datetime
+from time import monotonic
+
+from leitor_xlsx import em_lotes
+from planilhas import ler_linhas, separar_cabecalho, linhas_de_dados, ajustar_largura, nome_coluna
+
+# Armazém local (SQLite) com todas as linhas de todos os relatórios baixados.
+# Uma tabela por família de relatório (estoque, venda, analitico), particionada por
+# relatório/empresa/período; carregar de novo o mesmo relatório troca a partição inteira.
+# Uso como CLI: python armazem.py "SELECT ..." | python armazem.py --cargas
+
+ARQUIVO_ARMAZEM = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".armazem.sqlite")
+
+# Colunas normalizadas (indexadas), preenchidas a partir do primeiro nome de coluna que existir
+CANDIDATAS = {
+    "data_ref": ("data", "data_venda", "data_emissao", "emissao", "data_movimento", "data_documento"),
+    "sku_ref": ("sku", "cod_produto", "codigo_produto", "produto", "codigo", "referencia", "ref"),
+    "vendedor_ref": ("vendedor", "nome_vendedor"),
+}
+COLUNAS_FIXAS = ("carga_id", "relatorio", "empresa", "periodo") + tuple(CANDIDATAS)
+
+
+def _valor(valor):
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    return valor
+
+
+def _data_iso(valor):
+    if isinstance(valor, datetime):
+        return valor.date().isoformat()
+    if isinstance(valor, date):
+        return valor.isoformat()
+    if isinstance(valor, str):
+        for formato in ("%d/%m/%Y", "%Y-%m-%d", "%d/%m/%Y %H:%M:%S"):
+            try:
+                return datetime.strptime(valor.strip(), formato).date().isoformat()
+            except ValueError:
+                continue
+    return None
+
+
+class Armazem:
+    def __init__(self, caminho=ARQUIVO_ARMAZEM, empresa_padrao=""):
+        self.empresa_padrao = empresa_padrao
+        self.trava = threading.Lock()
+        self.conexao = sqlite3.connect(caminho, check_same_thread=False)
+        self.conexao.executescript("""
+            PRAGMA journal_mode = WAL;
+            CREATE TABLE IF NOT EXISTS cargas (
+                id INTEGER PRIMARY KEY,
+                tabela TEXT NOT NULL,
+                relatorio TEXT NOT NULL,
+                empresa TEXT NOT NULL,
+                periodo TEXT NOT NULL,
+                arquivo TEXT NOT NULL,
+                sha256 TEXT NOT NULL,
+                linhas INTEGER NOT NULL,
+                carregado_em TEXT NOT NULL,
+                UNIQUE (relatorio, empresa, periodo)
+            );
+        """)
+
+    def _colunas(self, tabela):
+        return [linha[1] for linha in self.conexao.execute(f'PRAGMA table_info("{tabela}")')]
+
+    def _preparar_tabela(self, tabela, colunas):
+        # Tabela criada na primeira carga; colunas novas do MyRP entram com ALTER TABLE
+        existentes = self._colunas(tabela)
+        if not existentes:
+            definicao = ", ".join(f'"{c}"' for c in COLUNAS_FIXAS + tuple(colunas))
+            self.conexao.execute(f'CREATE TABLE "{tabela}" ({definicao})')
+            self.conexao.execute(f'CREATE INDEX "idx_{tabela}_particao" ON "{tabela}" (relatorio, empresa, periodo)')
+            self.conexao.execute(f'CREATE INDEX "idx_{tabela}_data" ON "{tabela}" (data_ref, empresa)')
+            self.conexao.execute(f'CREATE INDEX "idx_{tabela}_sku" ON "{tabela}" (sku_ref)')
+            self.conexao.execute(f'CREATE INDEX "idx_{tabela}_vendedor" ON "{tabela}" (vendedor_ref, data_ref)')
+            return
+        for coluna in colunas:
+            if coluna not in existentes:
+                self.conexao.execute(f'ALTER TABLE "{tabela}" ADD COLUMN "{coluna}"')
+
+    def carregado(self, relatorio, empresa, periodo, sha256):
+        with self.trava:
+            linha = self.conexao.execute(
+                "SELECT sha256 FROM cargas WHERE relatorio = ? AND empresa = ? AND periodo = ?", (relatorio, empresa, periodo)
+            ).fetchone()
+        return bool(linha) and linha[0] == sha256
+
+    def carregar(self, caminho, tabela, relatorio, periodo, sha256, empresa=None):
+        # Idempotente: mesmo conteúdo (sha256) já carregado não é lido de novo
+        if self.carregado(relatorio, empresa or self.empresa_padrao, periodo, sha256):
+            return 0
+        cabecalho, linhas = separar_cabecalho(ler_linhas(caminho))
+        if cabecalho is None:
+            raise ValueError(f"{os.path.basename(caminho)}: cabeçalho não encontrado")
+        carga = self.iniciar_carga(caminho, cabecalho, tabela, relatorio, periodo, sha256, empresa)
+        try:
+            for lote in em_lotes(ajustar_largura(linhas_de_dados(linhas), len(cabecalho), os.path.basename(caminho))):
+                carga.escrever(lote)
+        except BaseException:
+            carga.cancelar()
+            raise
+        return carga.concluir()
+
+    def iniciar_carga(self, caminho, cabecalho, tabela, relatorio, periodo, sha256, empresa=None):
+        # Carga recebida em lotes (ex.: na mesma leitura que grava a cópia colunar); a partição
+        # só é trocada em concluir(), numa transação
+        return CargaArmazem(self, caminho, cabecalho, tabela, relatorio, empresa or self.empresa_padrao, periodo, sha256)
+
+    def consultar(self, sql, parametros=()):
+        with self.trava:
+            cursor = self.conexao.execute(sql, parametros)
+            return [d[0] for d in cursor.description or ()], cursor.fetchall()
+
+    def fechar(self):
+        self.conexao.close()
+
+
+class CargaArmazem:
+    def __init__(self, armazem, caminho, cabecalho, tabela, relatorio, empresa, periodo, sha256):
+        self.armazem = armazem
+        self.conexao = armazem.conexao
+        self.tabela = tabela
+        self.rotulo = f"{tabela}/{relatorio} {empresa} {periodo}"
+        self.particao = (relatorio, empresa, periodo)
+        self.inicio = monotonic()
+        self.quantidade = 0
+        colunas = []
+        for i, nome in enumerate(cabecalho):
+            coluna = nome_coluna(nome or f"coluna_{i + 1}")
+            while coluna in colunas or coluna in COLUNAS_FIXAS:
+                coluna += "_"
+            colunas.append(coluna)
+        self.normalizadas = [
+            (destino, next((colunas.index(c) for c in candidatas if c in colunas), None))
+            for destino, candidatas in CANDIDATAS.items()
+        ]
+        nomes = ", ".join(f'"{c}"' for c in COLUNAS_FIXAS + tuple(colunas))
+        marcadores = ", ".join("?" for _ in range(len(COLUNAS_FIXAS) + len(colunas)))
+        self.insercao = f'INSERT INTO "{tabela}" ({nomes}) VALUES ({marcadores})'
+        # A trava fica com a carga até concluir/cancelar: a conexão é compartilhada entre as threads
+        armazem.trava.acquire()
+        try:
+            armazem._preparar_tabela(tabela, colunas)
+            self.conexao.execute(
+                f'DELETE FROM "{tabela}" WHERE relatorio = ? AND empresa = ? AND periodo = ?', self.particao
+            )
+            cursor = self.conexao.execute(
+                "INSERT OR REPLACE INTO cargas (tabela, relatorio, empresa, periodo, arquivo, sha256, linhas, carregado_em) "
+                "VALUES (?, ?, ?, ?, ?, ?, 0, ?)",
+                (tabela, relatorio, empresa, periodo, os.path.abspath(caminho), sha256, datetime.now().isoformat(timespec="seconds")),
+            )
+            self.carga_id = cursor.lastrowid
+        except BaseException:
+            self.cancelar()
+            raise
+
+    def _registros(self, lote):
+        relatorio, empresa, periodo = self.particao
+        for linha in lote:
+            refs = []
+            for destino, indice in self.normalizadas:
+                valor = None if indice is None else linha[indice]
+                refs.append(_data_iso(valor) if destino == "data_ref" else _valor(valor))
+            yield (self.carga_id, relatorio, empresa, periodo, *refs, *(_valor(v) for v in linha))
+
+    def escrever(self, lote):
+        # lote: linhas de dados com a largura do cabeçalho (ajustar_largura)
+        self.quantidade += self.conexao.executemany(self.insercao, self._registros(lote)).rowcount
+
+    def concluir(self):
+        try:
+            self.conexao.execute("UPDATE cargas SET linhas = ? WHERE id = ?", (self.quantidade, self.carga_id))
+            self.conexao.commit()
+        except BaseException:
+            self.cancelar()
+            raise
+        self.armazem.trava.release()
+        print(f"[armazém] {self.rotulo}: {self.quantidade} linhas em {monotonic() - self.inicio:.2f}s")
+        return self.quantidade
+
+    def cancelar(self):
+        try:
+            self.conexao.rollback()
+        finally:
+            self.armazem.trava.release()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Consulta o armazém local dos relatórios.")
+    parser.add_argument("sql", nargs="?", help="consulta SQL (tabelas: estoque, venda, analitico, cargas)")
+    parser.add_argument("--cargas", action="store_true", help="lista os relatórios carregados")
+    parser.add_argument("--arquivo", default=ARQUIVO_ARMAZEM)
+    args = parser.parse_args()
+
+    armazem = Armazem(args.arquivo)
+    sql = "SELECT tabela, relatorio, empresa, periodo, linhas, carregado_em FROM cargas ORDER BY carregado_em" if args.cargas or not args.sql else args.sql
+    inicio = monotonic()
+    colunas, linhas = armazem.consultar(sql)
+    print(" | ".join(colunas))
+    for linha in linhas:
+        print(" | ".join("" if v is None else str(v) for v in linha))
+    print(f"\n{len(linhas)} linhas em {(monotonic() - inicio) * 1000:.1f} ms")
+    armazem.fechar()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+import json
+import os
+import re
+import tempfile
+import threading
+from time import monotonic
+
+from planilhas import ler_linhas, separar_cabecalho, ajustar_largura, escrever_planilha, openpyxl_disponivel, nome_coluna
+
+# Comparativo ano a ano a partir das duas vendas sintéticas por vendedor (ano atual e ano
+# passado): junta as duas por vendedor e período e pré-calcula diferença, crescimento e
+# acumulado de cada métrica, em XLSX (e .parquet, com pyarrow) ao lado das vendas.
+# Só é refeito quando o conteúdo (sha256) de uma das duas planilhas muda.
+# pandas é opcional: sem ele a etapa é pulada.
+
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+ARQUIVO_COMPARATIVOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".comparativos.json")
+
+NOME_COMPARATIVO = "{ano}_Comparativo_Venda_{ano_passado}.xlsx"
+
+COLUNAS_VENDEDOR = ("vendedor", "nome_vendedor")
+# Coluna opcional de mês/data: sem ela o período é o acumulado do arquivo inteiro, e o ano
+# atual (até hoje) fica lado a lado com o ano passado inteiro, sem crescimento calculado
+COLUNAS_PERIODO = ("mes", "mes_ano", "periodo", "data", "data_venda", "data_emissao")
+PERIODO_ACUMULADO = "acumulado: ano atual até hoje x ano passado inteiro"
+# Colunas numéricas que são identificadores, não métricas
+_IDENTIFICADOR = re.compile(r"^(c_)?(cod|codigo|id|cpf|cnpj)(_|$)")
+
+_trava = threading.Lock()
+
+
+def _entradas_anteriores(caminho, destino):
+    try:
+        with open(caminho, encoding="utf-8") as f:
+            return json.load(f).get(os.path.abspath(destino))
+    except (OSError, ValueError):
+        return None
+
+
+def _registrar_entradas(caminho, destino, entradas):
+    with _trava:
+        try:
+            with open(caminho, encoding="utf-8") as f:
+                dados = json.load(f)
+        except (OSError, ValueError):
+            dados = {}
+        dados[os.path.abspath(destino)] = entradas
+        temporario = caminho + ".tmp"
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump(dados, f, ensure_ascii=False, indent=2)
+        os.replace(temporario, caminho)
+
+
+def _coluna(colunas, candidatas):
+    normalizadas = {nome_coluna(c): c for c in colunas}
+    return next((normalizadas[c] for c in candidatas if c in normalizadas), None)
+
+
+def _periodo(serie):
+    # Mês (AAAA-MM → MM) para comparar o mesmo mês nos dois anos
+    datas = pd.to_datetime(serie, errors="coerce", dayfirst=True)
+    if datas.notna().any():
+        return datas.dt.strftime("%m")
+    return serie.astype(str).str.strip()
+
+
+def _tabela(caminho):
+    cabecalho, linhas = separar_cabecalho(ler_linhas(caminho))
+    if cabecalho is None:
+        raise ValueError(f"{os.path.basename(caminho)}: cabeçalho não encontrado")
+    nomes = [nome or f"coluna_{i + 1}" for i, nome in enumerate(cabecalho)]
+    dados = pd.DataFrame(
+        (linha for linha in ajustar_largura(linhas, len(nomes), os.path.basename(caminho)) if any(c is not None for c in linha)),
+        columns=nomes,
+    )
+    vendedor = _coluna(nomes, COLUNAS_VENDEDOR)
+    if vendedor is None:
+        raise ValueError(f"{os.path.basename(caminho)}: coluna de vendedor não encontrada")
+    periodo = _coluna(nomes, COLUNAS_PERIODO)
+    # Linhas de total do relatório não são vendedores
+    dados = dados[dados[vendedor].notna() & ~dados[vendedor].astype(str).str.strip().str.lower().str.startswith("total")]
+    tabela = pd.DataFrame({
+        "vendedor": dados[vendedor].astype(str).str.strip(),
+        "periodo": _periodo(dados[periodo]) if periodo else PERIODO_ACUMULADO,
+    })
+    for nome in nomes:
+        if nome in (vendedor, periodo) or _IDENTIFICADOR.match(nome_coluna(nome)):
+            continue
+        valores = pd.to_numeric(dados[nome], errors="coerce")
+        if valores.notna().any() and valores.notna().sum() == dados[nome].notna().sum():
+            tabela[nome] = valores
+    return tabela.groupby(["vendedor", "periodo"], as_index=False).sum()
+
+
+def calcular(caminho_atual, caminho_anterior):
+    # Uma linha por vendedor/período; para cada métrica presente nos dois anos:
+    # atual, anterior, diferença, crescimento (fração) e acumulados no ano
+    atual = _tabela(caminho_atual)
+    anterior = _tabela(caminho_anterior)
+    metricas = [c for c in atual.columns if c in anterior.columns and c not in ("vendedor", "periodo")]
+    if not metricas:
+        raise ValueError("nenhuma métrica numérica em comum entre os dois anos")
+    junto = atual[["vendedor", "periodo"] + metricas].merge(
+        anterior[["vendedor", "periodo"] + metricas], on=["vendedor", "periodo"], how="outer", suffixes=(" atual", " anterior"),
+    ).sort_values(["vendedor", "periodo"], ignore_index=True)
+    resultado = junto[["vendedor", "periodo"]].copy()
+    for metrica in metricas:
+        valor_atual = junto[f"{metrica} atual"].fillna(0)
+        valor_anterior = junto[f"{metrica} anterior"].fillna(0)
+        resultado[f"{metrica} atual"] = valor_atual
+        resultado[f"{metrica} anterior"] = valor_anterior
+        resultado[f"{metrica} diferença"] = valor_atual - valor_anterior
+        # Sem venda no ano passado o crescimento fica vazio (não é infinito); no acumulado
+        # também, porque os dois anos não cobrem o mesmo intervalo
+        base = valor_anterior.where((valor_anterior != 0) & (junto["periodo"] != PERIODO_ACUMULADO))
+        resultado[f"{metrica} crescimento"] = (valor_atual - valor_anterior) / base
+        resultado[f"{metrica} acumulado atual"] = valor_atual.groupby(junto["vendedor"]).cumsum()
+        resultado[f"{metrica} acumulado anterior"] = valor_anterior.groupby(junto["vendedor"]).cumsum()
+    return resultado
+
+
+def _gravar_parquet(destino, tabela, entradas):
+    fd, temporario = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(destino)), prefix=".", suffix=".part")
+    os.close(fd)
+    try:
+        arrow = pa.Table.from_pandas(tabela, preserve_index=False)
+        arrow = arrow.replace_schema_metadata(dict(arrow.schema.metadata or {}, sha256_origem=entradas))
+        pq.write_table(arrow, temporario, compression="zstd")
+        os.chmod(temporario, 0o644)
+        os.replace(temporario, destino)
+    except BaseException:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+
+
+def comparar(caminho_atual, sha_atual, caminho_anterior, sha_anterior, destino, registro=ARQUIVO_COMPARATIVOS):
+    # Devolve o caminho do comparativo quando foi refeito, None quando nada mudou
+    if pd is None or not (openpyxl_disponivel() or pa is not None):
+        return None
+    entradas = f"{sha_atual}:{sha_anterior}"
+    saida = destino if openpyxl_disponivel() else os.path.splitext(destino)[0] + ".parquet"
+    if _entradas_anteriores(registro, destino) == entradas and os.path.exists(saida):
+        return None
+    inicio = monotonic()
+    tabela = calcular(caminho_atual, caminho_anterior)
+    # Valores vazios (crescimento sem base) vão como célula vazia
+    linhas = (
+        [None if pd.isna(v) else v for v in linha]
+        for linha in tabela.itertuples(index=False, name=None)
+    )
+    if openpyxl_disponivel():
+        escrever_planilha(destino, list(tabela.columns), linhas)
+    if pa is not None:
+        _gravar_parquet(os.path.splitext(destino)[0] + ".parquet", tabela, entradas)
+    _registrar_entradas(registro, destino, entradas)
+    print(f"[comparativo] {os.path.basename(destino)}: {len(tabela)} linhas em {monotonic() - inicio:.2f}s")
+    return destino
@@ -0,0 +1,122 @@
+import hashlib
+import os
+import shutil
+import tempfile
+from time import monotonic
+from urllib.parse import urlparse, unquote
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.utils import requote_uri
+from urllib3.util.retry import Retry
+
+# Download direto dos relatórios a partir do link do blob (sem passar pela pasta Downloads)
+
+TAMANHO_BLOCO = 1024 * 1024
+TIMEOUT_CONEXAO = 10
+TIMEOUT_LEITURA = 120
+
+
+def criar_sessao(driver=None):
+    # Uma única sessão com pool de conexões, reutilizada por todos os relatórios
+    sessao = requests.Session()
+    retentativas = Retry(total=3, backoff_factor=1, status_forcelist=(429, 500, 502, 503, 504), allowed_methods=("GET", "HEAD"))
+    adaptador = HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=retentativas)
+    sessao.mount("https://", adaptador)
+    sessao.mount("http://", adaptador)
+    if driver is not None:
+        copiar_contexto_navegador(driver, sessao)
+    return sessao
+
+
+def copiar_contexto_navegador(driver, sessao):
+    # Mesmo user-agent e cookies do navegador autenticado
+    sessao.headers["User-Agent"] = driver.execute_script("return navigator.userAgent")
+    for cookie in driver.get_cookies():
+        sessao.cookies.set(cookie["name"], cookie["value"], domain=cookie.get("domain"), path=cookie.get("path", "/"))
+
+
+def precisa_navegador(excecao):
+    # Link que a sessão HTTP não tem permissão de baixar; o navegador ainda consegue
+    resposta = getattr(excecao, "response", None)
+    return resposta is not None and resposta.status_code in (401, 403)
+
+
+def normalizar_url(url):
+    # Forma única para comparar links: o DOM (a.href) devolve o link já percent-encoded e o
+    # JSON do MyRP pode trazê-lo cru (ex.: "Rel André.xlsx"); requote_uri é idempotente
+    return requote_uri(url)
+
+
+def nome_arquivo_url(url):
+    return unquote(os.path.basename(urlparse(url).path))
+
+
+def baixar_arquivo(sessao, url, destino, hash_atual=None, validar=None):
+    # Grava em arquivo temporário na mesma pasta do destino e só então renomeia (atômico).
+    # Se o conteúdo for igual ao já publicado (hash_atual), o destino não é reescrito.
+    # validar(temporario) confere o conteúdo antes de publicar (levanta exceção se inválido).
+    # Retorna (bytes, sha256, gravado).
+    inicio = monotonic()
+    sha = hashlib.sha256()
+    pasta = os.path.dirname(os.path.abspath(destino))
+    fd, temporario = tempfile.mkstemp(dir=pasta, prefix=".", suffix=".part")
+    # Fechado já: um erro na requisição não pode deixar o temporário aberto (no Windows o
+    # os.remove abaixo falharia e esconderia o erro HTTP, ex.: 401/403 do download pelo navegador)
+    os.close(fd)
+    try:
+        with sessao.get(url, stream=True, timeout=(TIMEOUT_CONEXAO, TIMEOUT_LEITURA)) as resposta:
+            resposta.raise_for_status()
+            # Com Content-Encoding o corpo chega descomprimido e o tamanho não confere
+            esperado = None if resposta.headers.get("Content-Encoding") else resposta.headers.get("Content-Length")
+            recebido = 0
+            with open(temporario, "wb") as arquivo:
+                for bloco in resposta.iter_content(chunk_size=TAMANHO_BLOCO):
+                    arquivo.write(bloco)
+                    sha.update(bloco)
+                    recebido += len(bloco)
+                arquivo.flush()
+                os.fsync(arquivo.fileno())
+        if esperado is not None and int(esperado) != recebido:
+            raise IOError(f"download incompleto: {recebido} de {esperado} bytes")
+        if recebido == 0:
+            raise IOError("download vazio")
+        sha256 = sha.hexdigest()
+        if hash_atual == sha256 and os.path.exists(destino):
+            os.remove(temporario)
+            print(f"[download] {os.path.basename(destino)}: conteúdo igual ao publicado, arquivo mantido")
+            return recebido, sha256, False
+        if validar is not None:
+            validar(temporario)
+        # mkstemp cria o arquivo com 0600; o relatório final é um arquivo comum
+        os.chmod(temporario, 0o644)
+        os.replace(temporario, destino)
+    except BaseException:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+    print(f"[download] {os.path.basename(destino)}: {recebido} bytes em {monotonic() - inicio:.2f}s")
+    return recebido, sha256, True
+
+
+def publicar_segundo_nome(origem, destino):
+    # Segundo nome para um arquivo já baixado, sem gravar o conteúdo de novo: hard link
+    # quando o volume permite; senão cópia. Nos dois casos vai para um temporário ao lado
+    # do destino e entra com os.replace, então quem lê nunca vê um arquivo pela metade.
+    fd, temporario = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(destino)), prefix=".", suffix=".part")
+    os.close(fd)
+    os.remove(temporario)
+    try:
+        try:
+            os.link(origem, temporario)
+            vinculado = True
+        except OSError:
+            shutil.copy2(origem, temporario)
+            vinculado = False
+        os.replace(temporario, destino)
+    except BaseException:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+    print(f"[download] {os.path.basename(destino)}: {'hard link' if vinculado else 'cópia'} de {os.path.basename(origem)}")
+    return vinculado
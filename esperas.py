@@ -0,0 +1,104 @@
+from time import monotonic
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+from perfil import perfil
+
+# Motor de esperas por condição: substitui os sleep() fixos do fluxo.
+# Cada espera registra quanto tempo realmente levou.
+
+INTERVALO_POLL = 0.2
+
+# Contador de requisições XHR/fetch pendentes, injetado em toda página nova.
+# Páginas que usam jQuery também são cobertas por jQuery.active.
+SCRIPT_MONITOR_REDE = """
+(function () {
+    if (window.__myrpPendentes !== undefined) { return; }
+    window.__myrpPendentes = 0;
+    var abrir = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function () {
+        window.__myrpPendentes++;
+        this.addEventListener('loadend', function () { window.__myrpPendentes--; });
+        return abrir.apply(this, arguments);
+    };
+    if (window.fetch) {
+        var buscar = window.fetch;
+        window.fetch = function () {
+            window.__myrpPendentes++;
+            return buscar.apply(this, arguments).finally(function () { window.__myrpPendentes--; });
+        };
+    }
+})();
+"""
+
+SCRIPT_REDE_OCIOSA = """
+var pendentes = window.__myrpPendentes || 0;
+if (window.jQuery) { pendentes += window.jQuery.active; }
+return document.readyState === 'complete' && pendentes <= 0;
+"""
+
+
+def _log(descricao, inicio, resultado="ok"):
+    duracao = monotonic() - inicio
+    perfil.espera(duracao)
+    print(f"[espera] {descricao}: {duracao:.2f}s ({resultado})")
+
+
+def instalar_monitor_rede(driver):
+    # Só o Chrome expõe o CDP; em outros navegadores a espera usa apenas readyState/jQuery
+    try:
+        driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": SCRIPT_MONITOR_REDE})
+    except (AttributeError, WebDriverException):
+        pass
+
+
+def aguardar(driver, condicao, timeout=20, descricao="condição", obrigatorio=True):
+    inicio = monotonic()
+    try:
+        resultado = WebDriverWait(driver, timeout, poll_frequency=INTERVALO_POLL).until(condicao)
+    except TimeoutException:
+        _log(descricao, inicio, "timeout")
+        if obrigatorio:
+            raise
+        return None
+    _log(descricao, inicio)
+    return resultado
+
+
+# --- Condições ---
+def rede_ociosa(driver):
+    try:
+        return driver.execute_script(SCRIPT_REDE_OCIOSA)
+    except WebDriverException:
+        # Página em transição (navegação em andamento): ainda não está ociosa
+        return False
+
+
+# --- Atalhos usados pelo fluxo ---
+def aguardar_pagina(driver, timeout=30, descricao="página carregada"):
+    return aguardar(driver, rede_ociosa, timeout, descricao)
+
+
+def aguardar_ocioso(driver, timeout=10, descricao="rede ociosa"):
+    # Após cliques que disparam AJAX; não interrompe o fluxo se a página nunca ficar ociosa
+    return aguardar(driver, rede_ociosa, timeout, descricao, obrigatorio=False)
+
+
+def aguardar_presente(driver, by, seletor, timeout=20, descricao=None):
+    return aguardar(driver, EC.presence_of_element_located((by, seletor)), timeout, descricao or f"presente {seletor}")
+
+
+def aguardar_visivel(driver, by, seletor, timeout=20, descricao=None):
+    return aguardar(driver, EC.visibility_of_element_located((by, seletor)), timeout, descricao or f"visível {seletor}")
+
+
+def aguardar_clicavel(driver, by, seletor, timeout=20, descricao=None):
+    return aguardar(driver, EC.element_to_be_clickable((by, seletor)), timeout, descricao or f"clicável {seletor}")
+
+
+def aguardar_modal_fechado(driver, by, seletor, timeout=10, descricao=None):
+    return aguardar(
+        driver, EC.invisibility_of_element_located((by, seletor)), timeout,
+        descricao or f"modal fechado {seletor}", obrigatorio=False,
+    )
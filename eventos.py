@@ -0,0 +1,102 @@
+import json
+import os
+from dataclasses import dataclass, asdict, field
+from datetime import datetime
+from time import monotonic
+from typing import Optional
+
+# Eventos tipados de cada etapa da execução (substituem a lista de strings de status).
+# O resumo, a lista de erros e o código de saída são calculados a partir destes campos.
+
+PASTA_LOGS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs")
+
+OK = "ok"
+ERRO = "erro"
+AVISO = "aviso"        # falha que não interrompe o relatório (ex.: botão opcional ausente)
+ATUAL = "atual"        # relatório já estava atualizado, nada a fazer
+PLANEJADO = "planejado"
+
+
+@dataclass
+class Evento:
+    relatorio: Optional[str]   # chave do relatório; None para etapas gerais (login, empresa)
+    etapa: str
+    resultado: str
+    duracao: Optional[float] = None
+    detalhe: str = ""
+    excecao: Optional[str] = None
+    momento: str = field(default_factory=lambda: datetime.now().isoformat(timespec="seconds"))
+
+    def __str__(self):
+        texto = f"{self.relatorio or 'geral'} - {self.etapa}: {self.resultado}"
+        if self.detalhe:
+            texto += f" ({self.detalhe})"
+        if self.excecao:
+            texto += f" - {self.excecao}"
+        return texto
+
+
+class RegistroEventos:
+    def __init__(self):
+        self.eventos = []
+        self._ultimo = {}
+
+    def registrar(self, relatorio, etapa, resultado, detalhe="", excecao=None, duracao=None):
+        # Sem duração explícita, usa o tempo desde o evento anterior do mesmo relatório
+        agora = monotonic()
+        if duracao is None and relatorio in self._ultimo:
+            duracao = agora - self._ultimo[relatorio]
+        self._ultimo[relatorio] = agora
+        evento = Evento(
+            relatorio, etapa, resultado,
+            round(duracao, 3) if duracao is not None else None,
+            detalhe, None if excecao is None else f"{type(excecao).__name__}: {excecao}".strip(),
+        )
+        self.eventos.append(evento)
+        return evento
+
+    def ok(self, relatorio, etapa, detalhe="", **kwargs):
+        return self.registrar(relatorio, etapa, OK, detalhe, **kwargs)
+
+    def erro(self, relatorio, etapa, excecao=None, detalhe="", **kwargs):
+        return self.registrar(relatorio, etapa, ERRO, detalhe, excecao, **kwargs)
+
+    def aviso(self, relatorio, etapa, excecao=None, detalhe="", **kwargs):
+        return self.registrar(relatorio, etapa, AVISO, detalhe, excecao, **kwargs)
+
+    # --- Consultas usadas pelo resumo ---
+    def relatorios(self):
+        # Relatórios considerados nesta execução, na ordem em que foram checados
+        vistos = []
+        for e in self.eventos:
+            if e.etapa == "resultado" or e.resultado == PLANEJADO:
+                if e.relatorio not in vistos:
+                    vistos.append(e.relatorio)
+        return vistos
+
+    def resultado(self, relatorio):
+        finais = [e for e in self.eventos if e.relatorio == relatorio and e.etapa == "resultado"]
+        return finais[-1] if finais else None
+
+    def planejado(self, relatorio):
+        return next((e for e in self.eventos if e.relatorio == relatorio and e.resultado == PLANEJADO), None)
+
+    def erros(self):
+        return [e for e in self.eventos if e.resultado == ERRO]
+
+    def codigo_saida(self):
+        # Falha se algum relatório planejado não terminou "ok"
+        for relatorio in self.relatorios():
+            final = self.resultado(relatorio)
+            if final is None or final.resultado not in (OK, ATUAL):
+                return 1
+        return 0
+
+    def salvar_jsonl(self, caminho=None):
+        if caminho is None:
+            os.makedirs(PASTA_LOGS, exist_ok=True)
+            caminho = os.path.join(PASTA_LOGS, f"eventos_{datetime.now():%Y%m%d_%H%M%S}.jsonl")
+        with open(caminho, "w", encoding="utf-8") as f:
+            for evento in self.eventos:
+                f.write(json.dumps(asdict(evento), ensure_ascii=False) + "\n")
+        return caminho
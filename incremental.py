@@ -0,0 +1,192 @@
+import json
+import os
+import sqlite3
+import threading
+from datetime import date, datetime
+
+from leitor_xlsx import em_lotes
+from planilhas import indice_coluna, ajustar_largura
+
+# Armazém local do mês para o analítico incremental: o primeiro download do mês (completo)
+# semeia as linhas; nos dias seguintes só o trecho desde a última data é pedido ao MyRP e
+# mesclado aqui, e a planilha publicada é refeita a partir do armazém.
+
+ARQUIVO_MENSAL = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".mensal.sqlite")
+
+
+def _data(valor):
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    if isinstance(valor, str):
+        for formato in ("%d/%m/%Y", "%Y-%m-%d", "%d/%m/%Y %H:%M:%S", "%Y-%m-%d %H:%M:%S"):
+            try:
+                return datetime.strptime(valor.strip(), formato).date()
+            except ValueError:
+                continue
+    return None
+
+
+# Datas guardadas com marcação para voltarem como data (e não texto) na planilha refeita
+def _codificar(valor):
+    if isinstance(valor, datetime):
+        return {"$dt": valor.isoformat()}
+    if isinstance(valor, date):
+        return {"$d": valor.isoformat()}
+    return valor
+
+
+def _decodificar(valor):
+    if isinstance(valor, dict):
+        if "$dt" in valor:
+            return datetime.fromisoformat(valor["$dt"])
+        if "$d" in valor:
+            return date.fromisoformat(valor["$d"])
+    return valor
+
+
+class CabecalhoDiferente(Exception):
+    pass
+
+
+class LojaMensal:
+    def __init__(self, caminho=ARQUIVO_MENSAL):
+        self.trava = threading.Lock()
+        self.conexao = sqlite3.connect(caminho, check_same_thread=False)
+        self.conexao.executescript("""
+            CREATE TABLE IF NOT EXISTS meses (
+                chave TEXT NOT NULL,
+                periodo TEXT NOT NULL,
+                colunas TEXT NOT NULL,
+                ultima_data TEXT,
+                PRIMARY KEY (chave, periodo)
+            );
+            CREATE TABLE IF NOT EXISTS linhas (
+                chave TEXT NOT NULL,
+                periodo TEXT NOT NULL,
+                id TEXT NOT NULL,
+                data TEXT NOT NULL,
+                valores TEXT NOT NULL,
+                PRIMARY KEY (chave, periodo, id)
+            );
+            CREATE INDEX IF NOT EXISTS idx_linhas_data ON linhas (chave, periodo, data);
+        """)
+
+    def ultima_data(self, chave, periodo):
+        with self.trava:
+            linha = self.conexao.execute(
+                "SELECT ultima_data FROM meses WHERE chave = ? AND periodo = ?", (chave, periodo)
+            ).fetchone()
+        return date.fromisoformat(linha[0]) if linha and linha[0] else None
+
+    def mesclar(self, chave, periodo, cabecalho, linhas, coluna_data, colunas_chave, inicio=None):
+        mesclagem = self.iniciar_mesclagem(chave, periodo, cabecalho, coluna_data, colunas_chave, inicio)
+        try:
+            for lote in em_lotes(ajustar_largura(linhas, len(cabecalho), f"{chave} {periodo}")):
+                mesclagem.escrever(lote)
+        except BaseException:
+            mesclagem.cancelar()
+            raise
+        mesclagem.concluir()
+
+    def iniciar_mesclagem(self, chave, periodo, cabecalho, coluna_data, colunas_chave, inicio=None):
+        # inicio=None semeia o mês inteiro; senão troca tudo a partir de "inicio" pelo trecho novo
+        # (cobre vendas canceladas/alteradas no período pedido de novo). As linhas chegam em
+        # lotes e entram numa transação só, confirmada em concluir()
+        return MesclagemMensal(self, chave, periodo, cabecalho, coluna_data, colunas_chave, inicio)
+
+    def ler(self, chave, periodo):
+        # Cabeçalho e linhas do mês, na ordem de data; as linhas saem do cursor uma a uma
+        # (o mês inteiro não é montado em memória)
+        with self.trava:
+            colunas = self.conexao.execute(
+                "SELECT colunas FROM meses WHERE chave = ? AND periodo = ?", (chave, periodo)
+            ).fetchone()
+        if not colunas:
+            return None, iter(())
+        return json.loads(colunas[0]), self._linhas_do_mes(chave, periodo)
+
+    def _linhas_do_mes(self, chave, periodo):
+        # A trava fica com o leitor até o fim: a conexão é compartilhada entre as threads
+        with self.trava:
+            cursor = self.conexao.execute(
+                "SELECT valores FROM linhas WHERE chave = ? AND periodo = ? ORDER BY data, rowid", (chave, periodo)
+            )
+            for (valores,) in cursor:
+                yield [_decodificar(v) for v in json.loads(valores)]
+
+    def apagar(self, chave, periodo):
+        with self.trava, self.conexao:
+            self.conexao.execute("DELETE FROM linhas WHERE chave = ? AND periodo = ?", (chave, periodo))
+            self.conexao.execute("DELETE FROM meses WHERE chave = ? AND periodo = ?", (chave, periodo))
+
+    def fechar(self):
+        self.conexao.close()
+
+
+class MesclagemMensal:
+    def __init__(self, loja, chave, periodo, cabecalho, coluna_data, colunas_chave, inicio=None):
+        self.loja = loja
+        self.conexao = loja.conexao
+        self.chave = chave
+        self.periodo = periodo
+        self.cabecalho = list(cabecalho)
+        self.indice_data = indice_coluna(cabecalho, coluna_data)
+        self.indices_chave = [indice_coluna(cabecalho, c) for c in colunas_chave]
+        # id = data + colunas-chave + ocorrência, para que linhas repetidas não se sobrescrevam
+        self.ocorrencias = {}
+        # A trava fica com a mesclagem até concluir/cancelar: a conexão é compartilhada entre as threads
+        loja.trava.acquire()
+        try:
+            if inicio is None:
+                self.conexao.execute("DELETE FROM linhas WHERE chave = ? AND periodo = ?", (chave, periodo))
+            else:
+                atual = self.conexao.execute(
+                    "SELECT colunas FROM meses WHERE chave = ? AND periodo = ?", (chave, periodo)
+                ).fetchone()
+                if not atual or json.loads(atual[0]) != self.cabecalho:
+                    raise CabecalhoDiferente(f"{chave} {periodo}: cabeçalho do trecho difere do armazenado")
+                self.conexao.execute(
+                    "DELETE FROM linhas WHERE chave = ? AND periodo = ? AND data >= ?", (chave, periodo, inicio.isoformat())
+                )
+        except BaseException:
+            self.cancelar()
+            raise
+
+    def _linhas(self, lote):
+        for linha in lote:
+            if not any(c is not None for c in linha):
+                continue
+            dia = _data(linha[self.indice_data])
+            if dia is None:
+                continue
+            base = "|".join([dia.isoformat()] + [str(linha[i]) for i in self.indices_chave])
+            self.ocorrencias[base] = self.ocorrencias.get(base, 0) + 1
+            valores = json.dumps([_codificar(v) for v in linha], ensure_ascii=False)
+            yield self.chave, self.periodo, f"{base}#{self.ocorrencias[base]}", dia.isoformat(), valores
+
+    def escrever(self, lote):
+        # lote: linhas com a largura do cabeçalho (ajustar_largura)
+        self.conexao.executemany("INSERT OR REPLACE INTO linhas VALUES (?, ?, ?, ?, ?)", self._linhas(lote))
+
+    def concluir(self):
+        try:
+            ultima = self.conexao.execute(
+                "SELECT MAX(data) FROM linhas WHERE chave = ? AND periodo = ?", (self.chave, self.periodo)
+            ).fetchone()[0]
+            self.conexao.execute(
+                "INSERT OR REPLACE INTO meses VALUES (?, ?, ?, ?)",
+                (self.chave, self.periodo, json.dumps(self.cabecalho, ensure_ascii=False), ultima),
+            )
+            self.conexao.commit()
+        except BaseException:
+            self.cancelar()
+            raise
+        self.loja.trava.release()
+
+    def cancelar(self):
+        try:
+            self.conexao.rollback()
+        finally:
+            self.loja.trava.release()
@@ -0,0 +1,61 @@
+import json
+import os
+import threading
+from datetime import date, datetime
+
+# Diário de etapas concluídas por relatório (solicitado, gerado no MyRP, baixado, copiado).
+# Gravado a cada etapa: se a execução cair, a próxima retoma do primeiro passo que faltou
+# (ex.: baixa de novo um relatório já gerado no servidor em vez de pedir outro).
+# Vale só no mesmo dia e para o mesmo período; relatórios concluídos saem do diário.
+
+ARQUIVO_JORNADA = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".jornada.json")
+
+SOLICITADO = "solicitado"
+GERADO = "gerado"
+BAIXADO = "baixado"
+COPIADO = "copiado"
+
+
+class Jornada:
+    def __init__(self, caminho=ARQUIVO_JORNADA, dia=None):
+        self.caminho = caminho
+        self.dia = (dia or date.today()).isoformat()
+        self.trava = threading.Lock()
+        try:
+            with open(caminho, encoding="utf-8") as f:
+                dados = json.load(f)
+        except (OSError, ValueError):
+            dados = {}
+        # Links e solicitações de outro dia não servem mais
+        self.relatorios = dados.get("relatorios", {}) if dados.get("dia") == self.dia else {}
+
+    def _gravar(self):
+        temporario = self.caminho + ".tmp"
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump({"dia": self.dia, "relatorios": self.relatorios}, f, ensure_ascii=False, indent=2)
+        os.replace(temporario, self.caminho)
+
+    def estado(self, chave, periodo):
+        with self.trava:
+            registro = self.relatorios.get(chave)
+            if not registro or registro.get("periodo") != periodo:
+                return {}
+            return dict(registro["etapas"])
+
+    def marcar(self, chave, periodo, etapa, **dados):
+        with self.trava:
+            registro = self.relatorios.get(chave)
+            if not registro or registro.get("periodo") != periodo:
+                registro = self.relatorios[chave] = {"periodo": periodo, "etapas": {}}
+            registro["etapas"][etapa] = dict(dados, momento=datetime.now().isoformat(timespec="seconds"))
+            self._gravar()
+
+    def concluir(self, chave):
+        # Relatório publicado: o manifesto passa a responder por ele
+        with self.trava:
+            if self.relatorios.pop(chave, None) is not None:
+                self._gravar()
+
+    def descartar(self, chave):
+        # Etapas que não valem mais (link expirado, relatório sumiu da lista): recomeça do zero
+        self.concluir(chave)
@@ -0,0 +1,188 @@
+import posixpath
+import re
+import zipfile
+from datetime import datetime, timedelta
+from functools import lru_cache
+from itertools import islice
+from xml.etree.ElementTree import iterparse
+
+# Leitor de XLSX em streaming (só biblioteca padrão): percorre o XML da primeira planilha
+# com iterparse e descarta cada linha depois de entregá-la, então a memória não cresce com
+# o número de linhas (o analítico do fim do mês passa de centenas de milhares de itens).
+# Só a tabela de textos compartilhados (sharedStrings) fica inteira em memória.
+
+TAMANHO_LOTE = 5000
+
+# Formatos numéricos nativos do Excel que são datas/horas
+FORMATOS_DATA = set(range(14, 23)) | {45, 46, 47}
+
+_REFERENCIA = re.compile(r"[A-Z]+")
+_TEXTO_FORMATO = re.compile(r'"[^"]*"|\[[^\]]*\]|\\.|_.|\*.')
+
+
+@lru_cache(maxsize=None)
+def _local(tag):
+    return tag.rsplit("}", 1)[-1]
+
+
+def _abrir(pacote, caminho):
+    # Nomes no pacote podem vir com "/" inicial nas relações
+    return pacote.open(caminho.lstrip("/"))
+
+
+def _caminho_planilha(pacote):
+    # Primeira planilha na ordem do workbook.xml, resolvida pelas relações
+    try:
+        with _abrir(pacote, "xl/workbook.xml") as arquivo:
+            primeira, data1904 = None, False
+            for _, elemento in iterparse(arquivo):
+                nome = _local(elemento.tag)
+                if nome == "workbookPr":
+                    data1904 = elemento.get("date1904") in ("1", "true")
+                elif nome == "sheet" and primeira is None:
+                    primeira = next((v for k, v in elemento.attrib.items() if _local(k) == "id"), None)
+        with _abrir(pacote, "xl/_rels/workbook.xml.rels") as arquivo:
+            for _, elemento in iterparse(arquivo):
+                if _local(elemento.tag) == "Relationship" and elemento.get("Id") == primeira:
+                    alvo = elemento.get("Target")
+                    caminho = alvo if alvo.startswith("/") else posixpath.normpath(posixpath.join("xl", alvo))
+                    return caminho, data1904
+    except KeyError:
+        pass
+    return "xl/worksheets/sheet1.xml", False
+
+
+def _textos_compartilhados(pacote):
+    textos = []
+    try:
+        arquivo = _abrir(pacote, "xl/sharedStrings.xml")
+    except KeyError:
+        return textos
+    with arquivo:
+        partes, fonetico = [], 0
+        for evento, elemento in iterparse(arquivo, events=("start", "end")):
+            nome = _local(elemento.tag)
+            if nome == "rPh":
+                # Guia fonético (japonês) não faz parte do texto
+                fonetico += 1 if evento == "start" else -1
+            elif evento == "end" and nome == "t" and not fonetico:
+                partes.append(elemento.text or "")
+            elif evento == "end" and nome == "si":
+                textos.append("".join(partes))
+                partes = []
+                elemento.clear()
+    return textos
+
+
+def _formato_e_data(codigo):
+    codigo = _TEXTO_FORMATO.sub("", codigo.split(";")[0]).lower()
+    return bool(re.search(r"[dmyhs]", codigo))
+
+
+def _estilos_data(pacote):
+    # Índices de estilo (atributo "s" da célula) cujo formato numérico é data/hora
+    try:
+        arquivo = _abrir(pacote, "xl/styles.xml")
+    except KeyError:
+        return set()
+    formatos, estilos, em_celulas = {}, [], False
+    with arquivo:
+        for evento, elemento in iterparse(arquivo, events=("start", "end")):
+            nome = _local(elemento.tag)
+            if nome == "cellXfs":
+                em_celulas = evento == "start"
+            elif evento == "end" and nome == "numFmt":
+                formatos[int(elemento.get("numFmtId"))] = elemento.get("formatCode", "")
+            elif evento == "end" and nome == "xf" and em_celulas:
+                estilos.append(int(elemento.get("numFmtId", 0)))
+    return {
+        i for i, formato in enumerate(estilos)
+        if formato in FORMATOS_DATA or (formato in formatos and _formato_e_data(formatos[formato]))
+    }
+
+
+def _coluna(referencia):
+    letras = _REFERENCIA.match(referencia).group()
+    indice = 0
+    for letra in letras:
+        indice = indice * 26 + ord(letra) - 64
+    return indice - 1
+
+
+def _numero(texto):
+    if any(c in texto for c in ".eE"):
+        return float(texto)
+    return int(texto)
+
+
+def _data_excel(numero, data1904):
+    # Mesma conversão do Excel/openpyxl, inclusive o 29/02/1900 que não existiu; a fração do
+    # dia é arredondada ao milissegundo (14:30 não vira 14:29:59.999999) e só hora vira time
+    dia, fracao = divmod(numero, 1)
+    hora = timedelta(milliseconds=round(fracao * 86400000))
+    if 0 <= numero < 1 and hora.days == 0:
+        return (datetime.min + hora).time()
+    if data1904:
+        base = datetime(1904, 1, 1)
+    elif numero < 60:
+        base = datetime(1899, 12, 31)
+    else:
+        base = datetime(1899, 12, 30)
+    return base + timedelta(days=dia) + hora
+
+
+def ler_linhas(caminho):
+    # Tuplas com os valores já tipados (int, float, str, bool, datetime), como o
+    # iter_rows(values_only=True) do openpyxl; linhas ausentes no XML são puladas
+    with zipfile.ZipFile(caminho) as pacote:
+        planilha, data1904 = _caminho_planilha(pacote)
+        textos = _textos_compartilhados(pacote)
+        datas = _estilos_data(pacote)
+        with _abrir(pacote, planilha) as arquivo:
+            dados, linha = None, []
+            for evento, elemento in iterparse(arquivo, events=("start", "end")):
+                nome = _local(elemento.tag)
+                if evento == "start":
+                    if nome == "sheetData":
+                        dados = elemento
+                    continue
+                if nome == "c":
+                    referencia = elemento.get("r")
+                    indice = _coluna(referencia) if referencia else len(linha)
+                    tipo = elemento.get("t", "n")
+                    valor = None
+                    if tipo == "inlineStr":
+                        valor = "".join(t.text or "" for t in elemento.iter() if _local(t.tag) == "t")
+                    else:
+                        bruto = next((filho.text for filho in elemento if _local(filho.tag) == "v"), None)
+                        if bruto is not None:
+                            if tipo == "s":
+                                valor = textos[int(bruto)]
+                            elif tipo == "b":
+                                valor = bruto == "1"
+                            elif tipo == "d":
+                                valor = datetime.fromisoformat(bruto)
+                            elif tipo in ("str", "e"):
+                                valor = bruto
+                            else:
+                                valor = _numero(bruto)
+                                if int(elemento.get("s", 0)) in datas:
+                                    valor = _data_excel(valor, data1904)
+                    if indice >= len(linha):
+                        linha.extend([None] * (indice - len(linha) + 1))
+                    linha[indice] = valor
+                elif nome == "row":
+                    yield tuple(linha)
+                    linha = []
+                    # Descarta as linhas já entregues (memória constante)
+                    if dados is not None:
+                        dados.clear()
+
+
+def em_lotes(linhas, tamanho=TAMANHO_LOTE):
+    linhas = iter(linhas)
+    while True:
+        lote = list(islice(linhas, tamanho))
+        if not lote:
+            return
+        yield lote
@@ -0,0 +1,89 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+# Índice dos arquivos produzidos (tipo de relatório, período, data de geração, tamanho e SHA-256).
+# A decisão "já gerado hoje / este mês / este ano" sai daqui, e não do mtime do arquivo,
+# que muda com a sincronização do G: ou com um simples "touch".
+
+ARQUIVO_MANIFESTO = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".manifesto.sqlite")
+
+# Formato de data que precisa coincidir com o de agora para o arquivo valer
+VALIDADE = {"dia": "%Y-%m-%d", "mes": "%Y-%m", "ano": "%Y"}
+
+
+def hash_arquivo(caminho, tamanho_bloco=1024 * 1024):
+    sha = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(tamanho_bloco), b""):
+            sha.update(bloco)
+    return sha.hexdigest()
+
+
+class Manifesto:
+    def __init__(self, caminho=ARQUIVO_MANIFESTO):
+        # Os downloads registram a partir de threads do agendador
+        self.trava = threading.Lock()
+        self.conexao = sqlite3.connect(caminho, check_same_thread=False)
+        self.conexao.execute("""
+            CREATE TABLE IF NOT EXISTS arquivos (
+                caminho TEXT PRIMARY KEY,
+                tipo TEXT NOT NULL,
+                periodo TEXT NOT NULL,
+                gerado_em TEXT NOT NULL,
+                tamanho INTEGER NOT NULL,
+                sha256 TEXT NOT NULL
+            )
+        """)
+        self.conexao.execute("CREATE INDEX IF NOT EXISTS idx_arquivos_tipo ON arquivos (tipo, periodo, gerado_em)")
+        self.conexao.commit()
+
+    def registrar(self, caminho, tipo, periodo, tamanho, sha256, gerado_em=None):
+        gerado_em = gerado_em or datetime.now()
+        with self.trava, self.conexao:
+            self.conexao.execute(
+                "INSERT OR REPLACE INTO arquivos VALUES (?, ?, ?, ?, ?, ?)",
+                (os.path.abspath(caminho), tipo, periodo, gerado_em.isoformat(timespec="seconds"), tamanho, sha256),
+            )
+
+    def hash_de(self, caminho):
+        with self.trava:
+            linha = self.conexao.execute("SELECT sha256 FROM arquivos WHERE caminho = ?", (os.path.abspath(caminho),)).fetchone()
+        return linha[0] if linha else None
+
+    def atualizado(self, tipo, periodo, validade, agora=None):
+        # Uma consulta: o registro mais recente do tipo, do mesmo período, gerado na mesma
+        # janela de validade e cujo arquivo ainda está lá com o mesmo tamanho
+        agora = agora or datetime.now()
+        with self.trava:
+            linha = self.conexao.execute(
+                "SELECT caminho, gerado_em, tamanho FROM arquivos WHERE tipo = ? AND periodo = ? ORDER BY gerado_em DESC LIMIT 1",
+                (tipo, periodo),
+            ).fetchone()
+        if not linha:
+            return False
+        caminho, gerado_em, tamanho = linha
+        formato = VALIDADE[validade]
+        if datetime.fromisoformat(gerado_em).strftime(formato) != agora.strftime(formato):
+            return False
+        try:
+            return os.path.getsize(caminho) == tamanho
+        except OSError:
+            return False
+
+    def importar_existente(self, caminho, tipo, periodo, validade, agora=None):
+        # Migração: arquivo anterior ao manifesto entra com base no mtime, uma única vez
+        agora = agora or datetime.now()
+        if not os.path.exists(caminho) or self.hash_de(caminho):
+            return False
+        modificado = datetime.fromtimestamp(os.path.getmtime(caminho))
+        formato = VALIDADE[validade]
+        if modificado.strftime(formato) != agora.strftime(formato):
+            return False
+        self.registrar(caminho, tipo, periodo, os.path.getsize(caminho), hash_arquivo(caminho), modificado)
+        return True
+
+    def fechar(self):
+        self.conexao.close()
@@ -0,0 +1,139 @@
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+
+from selenium.webdriver.chrome.options import Options
+
+# Perfis do Chrome: interativo (janela maximizada, como sempre foi) ou desacompanhado
+# (headless, sem imagens/fontes/extensões/GPU), para execuções agendadas em VM pequena.
+
+# Recursos que o fluxo não usa; os ícones "material-icons" continuam com o texto ('refresh')
+URLS_BLOQUEADAS = ["*.png", "*.jpg", "*.jpeg", "*.gif", "*.svg", "*.webp", "*.ico", "*.woff", "*.woff2", "*.ttf", "*.otf"]
+
+
+def opcoes_chrome(desacompanhado=False):
+    chrome_options = Options()
+    if not desacompanhado:
+        chrome_options.add_argument("--start-maximized")  # Maximiza a janela
+        return chrome_options
+
+    chrome_options.add_argument("--headless=new")
+    # Headless não tem janela: sem tamanho explícito alguns botões ficam fora da área clicável
+    chrome_options.add_argument("--window-size=1920,1080")
+    chrome_options.add_argument("--disable-gpu")
+    chrome_options.add_argument("--disable-extensions")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_argument("--disable-background-networking")
+    chrome_options.add_argument("--no-first-run")
+    chrome_options.add_argument("--mute-audio")
+    chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+    # A pasta de download é definida pela VigiaDownloads (Browser.setDownloadBehavior)
+    chrome_options.add_experimental_option("prefs", {
+        "download.prompt_for_download": False,
+        "download.directory_upgrade": True,
+        "profile.managed_default_content_settings.images": 2,
+    })
+    chrome_options.page_load_strategy = "eager"
+    return chrome_options
+
+
+def bloquear_recursos(driver):
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": URLS_BLOQUEADAS})
+    except Exception as e:
+        print(f"Não foi possível bloquear imagens/fontes: {e}")
+
+
+# --- ChromeDriver em cache local ---
+# O webdriver_manager consulta a rede a cada início; aqui ele só é usado quando
+# o driver em cache não corresponde à versão principal do Chrome instalado.
+
+PASTA_CACHE_DRIVER = os.path.join(os.path.expanduser("~"), ".cache", "myrp", "chromedriver")
+ARQUIVO_CACHE_DRIVER = "driver.json"
+
+
+def _versao_principal(texto):
+    encontrado = re.search(r"(\d+)\.\d+\.\d+", texto or "")
+    return encontrado.group(1) if encontrado else None
+
+
+def versao_chrome():
+    if sys.platform == "win32":
+        import winreg
+        for raiz in (winreg.HKEY_CURRENT_USER, winreg.HKEY_LOCAL_MACHINE):
+            try:
+                with winreg.OpenKey(raiz, r"Software\Google\Chrome\BLBeacon") as chave:
+                    return _versao_principal(winreg.QueryValueEx(chave, "version")[0])
+            except OSError:
+                continue
+        return None
+    if sys.platform == "darwin":
+        candidatos = ["/Applications/Google Chrome.app/Contents/MacOS/Google Chrome"]
+    else:
+        candidatos = ["google-chrome", "google-chrome-stable", "chromium", "chromium-browser"]
+    for executavel in candidatos:
+        try:
+            saida = subprocess.run([executavel, "--version"], capture_output=True, text=True, timeout=10).stdout
+        except (OSError, subprocess.SubprocessError):
+            continue
+        if _versao_principal(saida):
+            return _versao_principal(saida)
+    return None
+
+
+def versao_driver(caminho):
+    try:
+        saida = subprocess.run([caminho, "--version"], capture_output=True, text=True, timeout=10).stdout
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return _versao_principal(saida)
+
+
+def _ler_cache(pasta):
+    try:
+        with open(os.path.join(pasta, ARQUIVO_CACHE_DRIVER), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _gravar_cache(pasta, caminho_original, versao):
+    os.makedirs(pasta, exist_ok=True)
+    destino = os.path.join(pasta, os.path.basename(caminho_original))
+    if os.path.abspath(caminho_original) != os.path.abspath(destino):
+        shutil.copy2(caminho_original, destino)
+    with open(os.path.join(pasta, ARQUIVO_CACHE_DRIVER), "w", encoding="utf-8") as f:
+        json.dump({"caminho": destino, "versao": versao}, f)
+    return destino
+
+
+def resolver_chromedriver(fixo=None, pasta=PASTA_CACHE_DRIVER):
+    chrome = versao_chrome()
+
+    # 1) Binário fixado (CHROMEDRIVER); a versão só é conferida se a do Chrome for conhecida
+    if fixo and os.path.isfile(fixo):
+        if chrome is None or versao_driver(fixo) == chrome:
+            return fixo
+        print(f"CHROMEDRIVER {fixo} não corresponde ao Chrome {chrome}; procurando outro driver.")
+
+    # 2) Cache local: sem rede quando a versão confere (ou quando não dá para saber a do Chrome)
+    cache = _ler_cache(pasta)
+    if cache.get("caminho") and os.path.isfile(cache["caminho"]):
+        if chrome is None or cache.get("versao") == chrome:
+            return cache["caminho"]
+
+    # 3) Versões diferentes (ou cache vazio): baixa com o webdriver_manager e atualiza o cache
+    from webdriver_manager.chrome import ChromeDriverManager
+    try:
+        baixado = ChromeDriverManager().install()
+    except Exception as e:
+        # Sem acesso à rede: tenta o driver que houver em cache mesmo com versão diferente
+        if cache.get("caminho") and os.path.isfile(cache["caminho"]):
+            print(f"webdriver_manager indisponível ({e}); usando o chromedriver em cache.")
+            return cache["caminho"]
+        raise
+    return _gravar_cache(pasta, baixado, versao_driver(baixado) or chrome)
@@ -0,0 +1,242 @@
+import asyncio
+import base64
+import json
+import os
+import struct
+from time import monotonic
+from urllib.parse import urlsplit
+from urllib.request import urlopen
+
+from perfil import perfil
+
+# Núcleo assíncrono: fala com o Chrome direto pelo DevTools Protocol (CDP), num websocket
+# próprio (só biblioteca padrão) no mesmo navegador que o Selenium abriu. Cada aba vira uma
+# sessão CDP independente, então várias abas podem ser lidas/clicadas ao mesmo tempo, e as
+# esperas são por eventos (rede ociosa pelos eventos Network.*), sem trocar a janela ativa
+# do Selenium nem prender a thread com sleep. O Selenium continua sendo o caminho padrão
+# para o que este núcleo não cobre e a alternativa quando ele não consegue conectar.
+
+TIMEOUT_COMANDO = 30
+SILENCIO_REDE = 0.5
+INTERVALO_POLL = 0.05
+
+# Mesmo clique do Selenium, feito na página: devolve se o elemento existia
+SCRIPT_CLICAR = """
+(function (xpath) {
+    var el = document.evaluate(xpath, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+    if (!el) { return false; }
+    el.click();
+    return true;
+})(%s)
+"""
+
+
+class ErroCDP(Exception):
+    pass
+
+
+def endereco_depuracao(driver):
+    # O ChromeDriver sempre abre o Chrome com porta de depuração e informa o endereço nas capabilities
+    try:
+        return driver.capabilities.get("goog:chromeOptions", {}).get("debuggerAddress")
+    except AttributeError:
+        return None
+
+
+class _WebSocket:
+    # Cliente websocket mínimo (RFC 6455): quadros de texto com máscara, ping/pong e fechamento
+    def __init__(self, leitor, escritor):
+        self.leitor = leitor
+        self.escritor = escritor
+
+    @classmethod
+    async def conectar(cls, url, timeout=TIMEOUT_COMANDO):
+        partes = urlsplit(url)
+        leitor, escritor = await asyncio.wait_for(
+            asyncio.open_connection(partes.hostname, partes.port or 80, limit=2 ** 24), timeout
+        )
+        chave = base64.b64encode(os.urandom(16)).decode()
+        caminho = partes.path + (f"?{partes.query}" if partes.query else "")
+        escritor.write((
+            f"GET {caminho} HTTP/1.1\r\nHost: {partes.netloc}\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+            f"Sec-WebSocket-Key: {chave}\r\nSec-WebSocket-Version: 13\r\n\r\n"
+        ).encode())
+        await escritor.drain()
+        resposta = await asyncio.wait_for(leitor.readuntil(b"\r\n\r\n"), timeout)
+        status = resposta.split(b"\r\n", 1)[0]
+        if b" 101 " not in status:
+            escritor.close()
+            raise ErroCDP(f"websocket recusado: {status.decode(errors='replace')}")
+        return cls(leitor, escritor)
+
+    async def _quadro(self, opcode, dados):
+        cabecalho = bytes([0x80 | opcode])
+        tamanho = len(dados)
+        if tamanho < 126:
+            cabecalho += bytes([0x80 | tamanho])
+        elif tamanho < 2 ** 16:
+            cabecalho += bytes([0x80 | 126]) + struct.pack(">H", tamanho)
+        else:
+            cabecalho += bytes([0x80 | 127]) + struct.pack(">Q", tamanho)
+        mascara = os.urandom(4)
+        # XOR do quadro inteiro de uma vez, como inteiro (bem mais rápido que byte a byte)
+        repetida = (mascara * (tamanho // 4 + 1))[:tamanho]
+        mascarado = (int.from_bytes(dados, "big") ^ int.from_bytes(repetida, "big")).to_bytes(tamanho, "big")
+        self.escritor.write(cabecalho + mascara + mascarado)
+        await self.escritor.drain()
+
+    async def enviar(self, texto):
+        await self._quadro(0x1, texto.encode())
+
+    async def receber(self):
+        partes = []
+        while True:
+            primeiro, segundo = await self.leitor.readexactly(2)
+            opcode = primeiro & 0x0F
+            tamanho = segundo & 0x7F
+            if tamanho == 126:
+                tamanho = struct.unpack(">H", await self.leitor.readexactly(2))[0]
+            elif tamanho == 127:
+                tamanho = struct.unpack(">Q", await self.leitor.readexactly(8))[0]
+            mascara = await self.leitor.readexactly(4) if segundo & 0x80 else None
+            dados = await self.leitor.readexactly(tamanho)
+            if mascara:
+                repetida = (mascara * (tamanho // 4 + 1))[:tamanho]
+                dados = (int.from_bytes(dados, "big") ^ int.from_bytes(repetida, "big")).to_bytes(tamanho, "big")
+            if opcode == 0x8:
+                raise ConnectionError("websocket fechado pelo navegador")
+            if opcode == 0x9:
+                await self._quadro(0xA, dados)
+                continue
+            if opcode == 0xA:
+                continue
+            partes.append(dados)
+            if primeiro & 0x80:
+                return b"".join(partes).decode()
+
+    async def fechar(self):
+        try:
+            await self._quadro(0x8, b"")
+        except (ConnectionError, OSError):
+            pass
+        self.escritor.close()
+
+
+class ClienteCDP:
+    def __init__(self, websocket):
+        self.websocket = websocket
+        self.proximo_id = 0
+        self.respostas = {}
+        # (método, sessão) -> funções chamadas a cada evento
+        self.ouvintes = {}
+        self.leitura = asyncio.get_running_loop().create_task(self._ler())
+
+    @classmethod
+    async def conectar(cls, endereco):
+        # /json/version informa o websocket do navegador; as abas entram como sessões (flatten)
+        versao = await asyncio.to_thread(lambda: json.load(urlopen(f"http://{endereco}/json/version", timeout=10)))
+        return cls(await _WebSocket.conectar(versao["webSocketDebuggerUrl"]))
+
+    async def _ler(self):
+        try:
+            while True:
+                mensagem = json.loads(await self.websocket.receber())
+                if "id" in mensagem:
+                    resposta = self.respostas.pop(mensagem["id"], None)
+                    if resposta is None or resposta.done():
+                        continue
+                    if "error" in mensagem:
+                        resposta.set_exception(ErroCDP(mensagem["error"].get("message", mensagem["error"])))
+                    else:
+                        resposta.set_result(mensagem.get("result", {}))
+                    continue
+                for ouvinte in self.ouvintes.get((mensagem.get("method"), mensagem.get("sessionId")), ()):
+                    ouvinte(mensagem.get("params", {}))
+        except (ConnectionError, asyncio.IncompleteReadError, OSError) as e:
+            for resposta in self.respostas.values():
+                if not resposta.done():
+                    resposta.set_exception(ErroCDP(f"conexão CDP perdida: {e}"))
+            self.respostas.clear()
+
+    async def enviar(self, metodo, parametros=None, sessao=None, timeout=TIMEOUT_COMANDO):
+        if self.leitura.done():
+            raise ErroCDP("conexão CDP encerrada")
+        self.proximo_id += 1
+        mensagem = {"id": self.proximo_id, "method": metodo, "params": parametros or {}}
+        if sessao:
+            mensagem["sessionId"] = sessao
+        resposta = self.respostas[self.proximo_id] = asyncio.get_running_loop().create_future()
+        await self.websocket.enviar(json.dumps(mensagem))
+        try:
+            return await asyncio.wait_for(resposta, timeout)
+        finally:
+            self.respostas.pop(mensagem["id"], None)
+
+    def ouvir(self, metodo, sessao, funcao):
+        self.ouvintes.setdefault((metodo, sessao), []).append(funcao)
+
+    async def anexar(self, alvo):
+        # alvo: id do alvo CDP; no ChromeDriver é o próprio window handle da aba
+        sessao = (await self.enviar("Target.attachToTarget", {"targetId": alvo, "flatten": True}))["sessionId"]
+        aba = AbaCDP(self, sessao)
+        await self.enviar("Network.enable", {}, sessao)
+        return aba
+
+    async def fechar(self):
+        self.leitura.cancel()
+        await self.websocket.fechar()
+
+
+class AbaCDP:
+    def __init__(self, cliente, sessao):
+        self.cliente = cliente
+        self.sessao = sessao
+        self.em_voo = set()
+        self.ultima_atividade = monotonic()
+        cliente.ouvir("Network.requestWillBeSent", sessao, self._inicio_requisicao)
+        cliente.ouvir("Network.loadingFinished", sessao, self._fim_requisicao)
+        cliente.ouvir("Network.loadingFailed", sessao, self._fim_requisicao)
+
+    def _inicio_requisicao(self, evento):
+        self.em_voo.add(evento.get("requestId"))
+        self.ultima_atividade = monotonic()
+
+    def _fim_requisicao(self, evento):
+        self.em_voo.discard(evento.get("requestId"))
+        self.ultima_atividade = monotonic()
+
+    async def enviar(self, metodo, parametros=None):
+        return await self.cliente.enviar(metodo, parametros, self.sessao)
+
+    async def avaliar(self, expressao):
+        resultado = await self.enviar("Runtime.evaluate", {"expression": expressao, "returnByValue": True, "awaitPromise": True})
+        if "exceptionDetails" in resultado:
+            detalhes = resultado["exceptionDetails"]
+            raise ErroCDP(detalhes.get("exception", {}).get("description") or detalhes.get("text"))
+        return resultado.get("result", {}).get("value")
+
+    async def clicar(self, xpath):
+        return await self.avaliar(SCRIPT_CLICAR % json.dumps(xpath))
+
+    async def aguardar_ocioso(self, timeout=10, silencio=SILENCIO_REDE, descricao="rede ociosa (CDP)"):
+        # Ociosa = nenhuma requisição em andamento há "silencio" segundos; não interrompe o fluxo
+        inicio = monotonic()
+        while monotonic() - inicio < timeout:
+            if not self.em_voo and monotonic() - self.ultima_atividade >= silencio:
+                _log(descricao, inicio)
+                return True
+            await asyncio.sleep(INTERVALO_POLL)
+        _log(descricao, inicio, "timeout")
+        return False
+
+    async def desanexar(self):
+        try:
+            await self.cliente.enviar("Target.detachFromTarget", {"sessionId": self.sessao})
+        except ErroCDP:
+            pass
+
+
+def _log(descricao, inicio, resultado="ok"):
+    duracao = monotonic() - inicio
+    perfil.espera(duracao)
+    print(f"[espera] {descricao}: {duracao:.2f}s ({resultado})")
@@ -0,0 +1,138 @@
+import argparse
+import glob
+import json
+import math
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from time import monotonic
+
+# Perfil de tempo por etapa (tempo de parede, tempo esperando e tentativas) de cada execução.
+# Uso como CLI: python perfil.py [--ultimos N] [arquivos...] -> p50/p95 por etapa entre execuções.
+
+PASTA_LOGS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs")
+
+
+class Perfil:
+    def __init__(self):
+        self.inicio = datetime.now()
+        self.etapas = []
+        self._trava = threading.Lock()
+        self._local = threading.local()
+
+    def _pilha(self):
+        if not hasattr(self._local, "pilha"):
+            self._local.pilha = []
+        return self._local.pilha
+
+    @contextmanager
+    def etapa(self, relatorio, nome):
+        registro = {"relatorio": relatorio, "etapa": nome, "parede": 0.0, "espera": 0.0, "tentativas": 0}
+        pilha = self._pilha()
+        pilha.append(registro)
+        inicio = monotonic()
+        try:
+            yield registro
+        finally:
+            registro["parede"] = round(monotonic() - inicio, 3)
+            registro["espera"] = round(registro["espera"], 3)
+            pilha.pop()
+            with self._trava:
+                self.etapas.append(registro)
+
+    def registrar(self, relatorio, nome, parede, espera=0.0, tentativas=0):
+        # Para etapas que não cabem num bloco "with" (ex.: prontidão acompanhada em paralelo)
+        with self._trava:
+            self.etapas.append({
+                "relatorio": relatorio, "etapa": nome, "parede": round(parede, 3),
+                "espera": round(espera, 3), "tentativas": tentativas,
+            })
+
+    def espera(self, segundos):
+        # Chamado pelas esperas: soma em todas as etapas abertas nesta thread
+        for registro in self._pilha():
+            registro["espera"] += segundos
+
+    def tentativa(self, quantidade=1):
+        pilha = self._pilha()
+        if pilha:
+            pilha[-1]["tentativas"] += quantidade
+
+    def salvar(self, caminho=None):
+        if caminho is None:
+            os.makedirs(PASTA_LOGS, exist_ok=True)
+            caminho = os.path.join(PASTA_LOGS, f"perfil_{self.inicio:%Y%m%d_%H%M%S}.json")
+        with self._trava:
+            dados = {
+                "inicio": self.inicio.isoformat(timespec="seconds"),
+                "total": round((datetime.now() - self.inicio).total_seconds(), 3),
+                "etapas": list(self.etapas),
+            }
+        with open(caminho, "w", encoding="utf-8") as f:
+            json.dump(dados, f, ensure_ascii=False, indent=2)
+        return caminho
+
+
+# Perfil da execução atual, usado por todos os módulos
+perfil = Perfil()
+etapa = perfil.etapa
+
+
+# --- Comparação entre execuções ---
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[max(0, math.ceil(p / 100 * len(ordenados)) - 1)]
+
+
+def comparar(arquivos):
+    por_etapa = {}
+    totais = []
+    for caminho in arquivos:
+        with open(caminho, encoding="utf-8") as f:
+            dados = json.load(f)
+        totais.append(dados["total"])
+        # Etapas repetidas numa mesma execução são somadas (ex.: várias esperas do mesmo passo)
+        soma = {}
+        for e in dados["etapas"]:
+            chave = (e["relatorio"] or "geral", e["etapa"])
+            atual = soma.setdefault(chave, [0.0, 0.0, 0])
+            atual[0] += e["parede"]
+            atual[1] += e["espera"]
+            atual[2] += e["tentativas"]
+        for chave, valores in soma.items():
+            por_etapa.setdefault(chave, []).append(valores)
+
+    linhas = []
+    for (relatorio, nome_etapa), valores in sorted(por_etapa.items(), key=lambda item: -percentil([v[0] for v in item[1]], 95)):
+        parede = [v[0] for v in valores]
+        espera = [v[1] for v in valores]
+        tentativas = [v[2] for v in valores]
+        linhas.append((
+            relatorio, nome_etapa, len(valores),
+            percentil(parede, 50), percentil(parede, 95),
+            percentil(espera, 50), percentil(espera, 95),
+            sum(tentativas) / len(tentativas),
+        ))
+    return linhas, totais
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara perfis de execução (p50/p95 por etapa).")
+    parser.add_argument("arquivos", nargs="*", help="perfis a comparar (padrão: logs/perfil_*.json)")
+    parser.add_argument("--ultimos", type=int, default=30, help="quantidade de execuções mais recentes")
+    args = parser.parse_args()
+
+    arquivos = args.arquivos or sorted(glob.glob(os.path.join(PASTA_LOGS, "perfil_*.json")))[-args.ultimos:]
+    if not arquivos:
+        print("Nenhum perfil encontrado.")
+        return
+    linhas, totais = comparar(arquivos)
+    print(f"{len(arquivos)} execuções - total p50 {percentil(totais, 50):.1f}s, p95 {percentil(totais, 95):.1f}s\n")
+    print(f"{'relatório':<20} {'etapa':<22} {'n':>3} {'p50':>8} {'p95':>8} {'espera p50':>11} {'espera p95':>11} {'tent.':>6}")
+    for relatorio, nome_etapa, n, p50, p95, e50, e95, tentativas in linhas:
+        print(f"{relatorio:<20} {nome_etapa:<22} {n:>3} {p50:>7.1f}s {p95:>7.1f}s {e50:>10.1f}s {e95:>10.1f}s {tentativas:>6.1f}")
+
+
+if __name__ == "__main__":
+    main()
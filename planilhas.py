@@ -0,0 +1,281 @@
+import os
+import re
+import tempfile
+import unicodedata
+from datetime import date, datetime
+from itertools import chain
+from time import monotonic
+
+from leitor_xlsx import ler_linhas, em_lotes
+
+# Etapa depois do download: confere a planilha (lida em streaming pelo leitor_xlsx, linha a
+# linha e sem carregar a pasta de trabalho inteira) antes de publicar e grava uma cópia
+# colunar (.parquet) ao lado, para quem consome os dados não precisar abrir o XLSX de novo.
+# openpyxl (só para escrever planilhas) e pyarrow são opcionais: sem eles a etapa
+# correspondente é pulada.
+
+try:
+    from openpyxl import Workbook
+except ImportError:
+    Workbook = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+# Linha de cabeçalho: só textos, pelo menos este número deles, e a mais larga entre as linhas
+# de título que vêm antes dos dados (procurada no máximo até LIMITE_TITULO linhas)
+MIN_COLUNAS_CABECALHO = 2
+LIMITE_TITULO = 30
+
+
+def openpyxl_disponivel():
+    return Workbook is not None
+
+
+class PlanilhaInvalida(Exception):
+    pass
+
+
+def nome_coluna(texto):
+    texto = unicodedata.normalize("NFKD", str(texto)).encode("ascii", "ignore").decode().lower()
+    texto = re.sub(r"[^a-z0-9]+", "_", texto).strip("_") or "coluna"
+    return f"c_{texto}" if texto[0].isdigit() else texto
+
+
+def indice_coluna(cabecalho, nome):
+    # Posição da coluna pelo nome normalizado ("DATA", "Data " e "data" são a mesma coluna)
+    procurado = nome_coluna(nome)
+    return next((i for i, c in enumerate(cabecalho or ()) if c and nome_coluna(c) == procurado), None)
+
+
+def _textos(linha):
+    # Quantidade de textos da linha, ou None quando ela tem outro tipo de valor (é dado)
+    preenchidas = [c for c in linha if c is not None and str(c).strip()]
+    if not all(isinstance(c, str) for c in preenchidas):
+        return None
+    return len(preenchidas)
+
+
+def separar_cabecalho(linhas, colunas=()):
+    # Relatórios do MyRP podem ter linhas de título antes do cabeçalho, inclusive com dois
+    # textos (ex.: nome do relatório e empresa). Com "colunas", o cabeçalho é a linha que tem
+    # todas; senão, a mais larga só de textos antes da primeira linha de dados.
+    # Devolve (cabecalho, linhas seguintes ao cabeçalho)
+    linhas = iter(linhas)
+    lidas = []
+    for linha in linhas:
+        quantidade = _textos(linha)
+        if quantidade is not None and colunas and all(indice_coluna(_nomes(linha), c) is not None for c in colunas):
+            return _nomes(linha), linhas
+        lidas.append(linha)
+        if quantidade is None or len(lidas) >= LIMITE_TITULO:
+            break
+    larguras = [(_textos(linha) or 0, -i) for i, linha in enumerate(lidas)]
+    if not larguras or max(larguras)[0] < MIN_COLUNAS_CABECALHO:
+        return None, chain(lidas, linhas)
+    indice = -max(larguras)[1]
+    return _nomes(lidas[indice]), chain(lidas[indice + 1:], linhas)
+
+
+def _nomes(linha):
+    return [str(c).strip() if c is not None else "" for c in linha]
+
+
+def ajustar_largura(linhas, largura, rotulo):
+    # Linhas com a largura do cabeçalho: valores à direita dele não têm coluna e são
+    # descartados, mas nunca em silêncio
+    excedentes = 0
+    for linha in linhas:
+        if len(linha) > largura and any(c is not None for c in linha[largura:]):
+            excedentes += 1
+        yield tuple(linha[:largura]) + (None,) * (largura - len(linha))
+    if excedentes:
+        print(f"[planilha] {rotulo}: {excedentes} linhas com valores à direita do cabeçalho (descartados)")
+
+
+class Leitura:
+    # O que a validação já viu ao percorrer a planilha: cabeçalho, linhas de dados e os tipos
+    # de cada coluna. Quem grava depois (cópia colunar) usa os tipos sem reler o arquivo
+    def __init__(self, cabecalho, colunas=()):
+        self.cabecalho = cabecalho
+        self.colunas = colunas
+        self.quantidade = 0
+        self.tipos = [set() for _ in cabecalho]
+
+    def observar(self, linha):
+        self.quantidade += 1
+        for tipos, valor in zip(self.tipos, linha):
+            tipos.add(type(valor))
+
+    def reler(self, caminho):
+        # Linhas de dados do mesmo arquivo (mesmo cabeçalho), com a largura do cabeçalho
+        _, linhas = separar_cabecalho(ler_linhas(caminho), self.colunas)
+        return ajustar_largura(linhas_de_dados(linhas), len(self.cabecalho), os.path.basename(caminho))
+
+
+def linhas_de_dados(linhas):
+    return (linha for linha in linhas if any(c is not None for c in linha))
+
+
+def validar_planilha(caminho, colunas=(), min_linhas=0):
+    # Lê a planilha inteira uma vez: arquivo truncado ou corrompido falha aqui, antes de publicar
+    inicio = monotonic()
+    try:
+        cabecalho, linhas = separar_cabecalho(ler_linhas(caminho), colunas)
+        if cabecalho is None:
+            raise PlanilhaInvalida("cabeçalho não encontrado")
+        faltando = [c for c in colunas if indice_coluna(cabecalho, c) is None]
+        if faltando:
+            raise PlanilhaInvalida(f"colunas ausentes: {', '.join(faltando)}")
+        leitura = Leitura(cabecalho, colunas)
+        for linha in linhas_de_dados(linhas):
+            leitura.observar(linha)
+    except PlanilhaInvalida:
+        raise
+    except Exception as e:
+        raise PlanilhaInvalida(f"planilha ilegível: {type(e).__name__}: {e}") from e
+    if leitura.quantidade < min_linhas:
+        raise PlanilhaInvalida(f"{leitura.quantidade} linhas, mínimo {min_linhas}")
+    print(f"[planilha] {os.path.basename(caminho)}: {len(cabecalho)} colunas, {leitura.quantidade} linhas em {monotonic() - inicio:.2f}s")
+    return leitura
+
+
+def caminho_colunar(caminho):
+    return os.path.splitext(caminho)[0] + ".parquet"
+
+
+def colunar_atualizado(caminho, sha256):
+    return pa is None or _hash_colunar(caminho_colunar(caminho)) == sha256
+
+
+def _hash_colunar(destino):
+    try:
+        metadados = pq.read_schema(destino).metadata or {}
+    except Exception:
+        return None
+    return metadados.get(b"sha256_origem", b"").decode() or None
+
+
+def _tipo(tipos):
+    # Tipo de cada coluna decidido pelos tipos vistos na leitura; colunas misturadas vão como texto
+    tipos = tipos - {type(None)}
+    if not tipos:
+        return pa.string()
+    if tipos == {bool}:
+        return pa.bool_()
+    if tipos == {int}:
+        return pa.int64()
+    if tipos <= {int, float}:
+        return pa.float64()
+    if tipos == {datetime}:
+        return pa.timestamp("us")
+    if tipos == {date}:
+        return pa.date32()
+    return pa.string()
+
+
+class EscritorColunar:
+    # Cópia .parquet de um XLSX, gravada em lotes (memória limitada ao lote) num temporário
+    # ao lado e publicada com os.replace em concluir(); o esquema sai da Leitura da validação
+    def __init__(self, caminho, sha256, leitura):
+        self.destino = caminho_colunar(caminho)
+        self.inicio = monotonic()
+        self.total = 0
+        # Nomes vazios/repetidos não são aceitos como colunas
+        nomes = []
+        for i, nome in enumerate(leitura.cabecalho):
+            nome = nome or f"coluna_{i + 1}"
+            while nome in nomes:
+                nome += "_"
+            nomes.append(nome)
+        self.esquema = pa.schema([(n, _tipo(t)) for n, t in zip(nomes, leitura.tipos)], metadata={"sha256_origem": sha256})
+        self.textos = [i for i, campo in enumerate(self.esquema) if campo.type == pa.string()]
+        self.decimais = [i for i, campo in enumerate(self.esquema) if campo.type == pa.float64()]
+        fd, self.temporario = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.destino)), prefix=".", suffix=".part")
+        os.close(fd)
+        try:
+            self.escritor = pq.ParquetWriter(self.temporario, self.esquema, compression="zstd")
+        except BaseException:
+            os.remove(self.temporario)
+            raise
+
+    def escrever(self, lote):
+        # lote: linhas com a largura do cabeçalho (ajustar_largura)
+        colunas = [list(coluna) for coluna in zip(*lote)] or [[] for _ in self.esquema]
+        for i in self.textos:
+            colunas[i] = [None if v is None else str(v) for v in colunas[i]]
+        for i in self.decimais:
+            colunas[i] = [None if v is None else float(v) for v in colunas[i]]
+        self.escritor.write_table(pa.table(colunas, schema=self.esquema))
+        self.total += len(lote)
+
+    def concluir(self):
+        try:
+            self.escritor.close()
+            os.chmod(self.temporario, 0o644)
+            os.replace(self.temporario, self.destino)
+        except BaseException:
+            self.cancelar()
+            raise
+        print(f"[planilha] {os.path.basename(self.destino)}: {self.total} linhas em {monotonic() - self.inicio:.2f}s")
+        return self.destino
+
+    def cancelar(self):
+        try:
+            self.escritor.close()
+        except Exception:
+            pass
+        if os.path.exists(self.temporario):
+            os.remove(self.temporario)
+
+
+def ler_planilha(caminho):
+    # Leitura completa sem validação (conteúdo que não passou por validar_planilha agora)
+    cabecalho, linhas = separar_cabecalho(ler_linhas(caminho))
+    if cabecalho is None:
+        return None
+    leitura = Leitura(cabecalho)
+    for linha in linhas_de_dados(linhas):
+        leitura.observar(linha)
+    return leitura
+
+
+def gravar_colunar(caminho, sha256, leitura=None):
+    # Uma cópia .parquet por XLSX, refeita só quando o conteúdo do XLSX muda. Sem a Leitura
+    # da validação, os tipos custam uma passada a mais pelo arquivo
+    if colunar_atualizado(caminho, sha256):
+        return caminho_colunar(caminho) if pa is not None else None
+    leitura = leitura or ler_planilha(caminho)
+    if leitura is None:
+        return None
+    escritor = EscritorColunar(caminho, sha256, leitura)
+    try:
+        for lote in em_lotes(leitura.reler(caminho)):
+            escritor.escrever(lote)
+    except BaseException:
+        escritor.cancelar()
+        raise
+    return escritor.concluir()
+
+
+def escrever_planilha(caminho, cabecalho, linhas):
+    # Modo write-only (linha a linha, sem montar a planilha em memória), publicado com os.replace
+    fd, temporario = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(caminho)), prefix=".", suffix=".part")
+    os.close(fd)
+    try:
+        pasta = Workbook(write_only=True)
+        planilha = pasta.create_sheet()
+        planilha.append(cabecalho)
+        for linha in linhas:
+            planilha.append(linha)
+        with open(temporario, "wb") as arquivo:
+            pasta.save(arquivo)
+        os.chmod(temporario, 0o644)
+        os.replace(temporario, caminho)
+    except BaseException:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
@@ -0,0 +1,77 @@
+import json
+import os
+import random
+from statistics import median
+from time import monotonic
+
+# Espera limitada, com backoff exponencial e jitter, até o relatório ficar pronto no MyRP.
+# O histórico de quanto cada relatório levou define o atraso da primeira verificação da próxima vez.
+
+ARQUIVO_HISTORICO = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".historico_prontidao.json")
+MAX_HISTORICO = 20
+
+ATRASO_MIN = 2.0
+ATRASO_MAX = 30.0
+FATOR_BACKOFF = 1.6
+JITTER = 0.2
+
+
+class HistoricoProntidao:
+    def __init__(self, caminho=ARQUIVO_HISTORICO):
+        self.caminho = caminho
+        try:
+            with open(caminho, encoding="utf-8") as f:
+                self.duracoes = json.load(f)
+        except (OSError, ValueError):
+            self.duracoes = {}
+
+    def registrar(self, chave, duracao):
+        self.duracoes.setdefault(chave, []).append(round(duracao, 2))
+        self.duracoes[chave] = self.duracoes[chave][-MAX_HISTORICO:]
+
+    def atraso_inicial(self, chave):
+        # Começa a verificar um pouco antes do tempo típico de geração
+        duracoes = self.duracoes.get(chave)
+        if not duracoes:
+            return ATRASO_MIN
+        return max(ATRASO_MIN, median(duracoes) * 0.8)
+
+    def salvar(self):
+        temporario = self.caminho + ".tmp"
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump(self.duracoes, f, indent=2)
+        os.replace(temporario, self.caminho)
+
+
+class Prontidao:
+    # Estado de espera de um relatório; o agendador consulta várias ao mesmo tempo
+    def __init__(self, chave, prazo, historico):
+        self.chave = chave
+        self.historico = historico
+        self.inicio = monotonic()
+        self.limite = self.inicio + prazo
+        self.atraso = ATRASO_MIN
+        self.tentativas = 0
+        self.proxima = self.inicio + historico.atraso_inicial(chave)
+
+    def vencida(self, agora=None):
+        return (agora or monotonic()) >= self.limite
+
+    def deve_verificar(self, agora=None):
+        return (agora or monotonic()) >= self.proxima
+
+    def nao_pronto(self, agora=None):
+        agora = agora or monotonic()
+        self.tentativas += 1
+        espera = self.atraso * random.uniform(1 - JITTER, 1 + JITTER)
+        self.proxima = min(agora + espera, self.limite)
+        self.atraso = min(ATRASO_MAX, self.atraso * FATOR_BACKOFF)
+
+    def pronto(self, agora=None):
+        duracao = (agora or monotonic()) - self.inicio
+        self.historico.registrar(self.chave, duracao)
+        return duracao
+
+
+def proxima_verificacao(prontidoes):
+    return min(p.proxima for p in prontidoes)
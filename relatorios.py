@@ -0,0 +1,502 @@
+import os
+import re
+import shutil
+import tempfile
+from dataclasses import dataclass, replace
+from datetime import date
+from functools import partial
+from typing import Optional, Tuple
+
+from selenium.webdriver.common.by import By
+
+from agendador import gerar_em_paralelo
+from downloads import baixar_arquivo, nome_arquivo_url, publicar_segundo_nome
+from eventos import ATUAL, PLANEJADO
+from jornada import BAIXADO, COPIADO
+from leitor_xlsx import em_lotes
+from planilhas import (
+    validar_planilha, ler_planilha, colunar_atualizado, EscritorColunar, ler_linhas, separar_cabecalho, escrever_planilha,
+    indice_coluna,
+)
+from incremental import CabecalhoDiferente
+from comparativo import comparar, NOME_COMPARATIVO
+from manifesto import hash_arquivo
+from perfil import etapa
+from esperas import aguardar_presente, aguardar_clicavel, aguardar_ocioso, aguardar_modal_fechado
+
+# Relatórios descritos por dados (EspecRelatorio) e um único motor que executa qualquer um deles.
+# Nome, período e assinatura aceitam {ano}, {mes}, {hoje}, {mes_anterior}, {ano_mes_anterior} e {ano_passado}.
+
+URL_RELATORIOS = "https://hering.myrp.app/app/gerencial/relatorios/relatoriosAvancados/gerar/?tipo={tipo}"
+
+XPATH_ENTENDI = "//button[contains(@class, 'btn blue') and contains(text(), 'ENTENDI')]"
+XPATH_GERAR = "//a[contains(@class, '_c-btn--primary') and contains(text(), 'Gerar Relatório')]"
+XPATH_PERIODO = "//select[contains(@class, 'browser-default') and contains(@class, '_bglightGray') and option[@value='{periodo}']]"
+XPATH_TIPO_RELATORIO = "//select[@id][@name='tipoRelatorio']"
+
+# Período personalizado (analítico incremental): opção do select de período e campos de data
+PERIODO_PERSONALIZADO = "personalizado"
+XPATH_DATA_INICIAL = "//input[@name='dataInicial']"
+XPATH_DATA_FINAL = "//input[@name='dataFinal']"
+
+# Dispara o evento de change para o MyRP perceber a seleção
+SCRIPT_MARCAR_RADIO = """
+    var radio = arguments[0];
+    if (!radio.checked) {
+        radio.click();
+        var evt = document.createEvent('HTMLEvents');
+        evt.initEvent('change', true, true);
+        radio.dispatchEvent(evt);
+    }
+"""
+SCRIPT_SELECIONAR = """
+    var sel = arguments[0];
+    var valor = arguments[1];
+    sel.value = valor;
+    for (var i = 0; i < sel.options.length; i++) {
+        sel.options[i].selected = sel.options[i].value === valor;
+    }
+    var evt = document.createEvent('HTMLEvents');
+    evt.initEvent('change', true, true);
+    sel.dispatchEvent(evt);
+"""
+
+# Campo de data: input type=date usa AAAA-MM-DD; os demais, DD/MM/AAAA
+SCRIPT_PREENCHER_DATA = """
+    var campo = arguments[0];
+    campo.value = campo.type === 'date' ? arguments[1] : arguments[2];
+    campo.dispatchEvent(new Event('input', {bubbles: true}));
+    campo.dispatchEvent(new Event('change', {bubbles: true}));
+"""
+
+MENSAGENS_VALIDADE = {"dia": "já gerado hoje", "mes": "já gerado este mês", "ano": "já gerado este ano"}
+
+
+@dataclass(frozen=True)
+class EspecRelatorio:
+    chave: str
+    tipo: str                              # ?tipo= da página de relatórios (estoque/venda)
+    pasta: str                             # chave do destino em "pastas"
+    nome: str                              # arquivo publicado
+    periodo: str                           # período gravado no manifesto
+    validade: str = "dia"                  # janela em que o arquivo vale: dia/mes/ano
+    remover: int = 2                       # relatórios antigos removidos da lista antes de solicitar
+    agrupamento: Optional[str] = None      # id do radio de agrupamento (ex.: "vendedor")
+    tipo_relatorio: Optional[str] = None   # valor do select tipoRelatorio ("2" = analítico)
+    periodo_myrp: Optional[str] = None     # valor do select de período (este_mes, mes_passado, ano_passado)
+    assinatura: Tuple[str, ...] = ()       # trechos que identificam o relatório na lista
+    clique_nativo: bool = False            # clica em "Gerar" pelo Selenium em vez de JS
+    manter_nome_original: bool = False     # grava também com o nome do link e publica uma cópia
+    resumo_so_gerado: bool = False         # no resumo final, só aparece quando gerado nesta execução
+    colunas: Tuple[str, ...] = ()          # colunas que o cabeçalho da planilha precisa ter
+    min_linhas: int = 0                    # mínimo de linhas de dados (0: relatório vazio é válido)
+    incremental: bool = False              # mês mantido no armazém local: pede só o trecho desde a última data
+    coluna_data: Optional[str] = None      # coluna com a data da venda (incremental)
+    colunas_chave: Tuple[str, ...] = ()    # colunas que identificam a linha (incremental)
+    assinatura_trecho: Tuple[str, ...] = ()  # assinatura do pedido incremental ({desde} = data inicial)
+    desde: Optional[date] = None           # preenchido na execução: início do trecho pedido
+    empresa: Optional[str] = None          # loja do modo em lote (None = empresa principal)
+
+    @property
+    def url(self):
+        return URL_RELATORIOS.format(tipo=self.tipo)
+
+    @property
+    def periodo_pedido(self):
+        # Usado pela jornada: um trecho não pode ser retomado como se fosse o mês inteiro
+        return f"{self.periodo} desde {self.desde.isoformat()}" if self.desde else self.periodo
+
+    @property
+    def rotulo(self):
+        return f"{self.nome} ({self.empresa})" if self.empresa else self.nome
+
+    def para_empresa(self, empresa):
+        # A chave leva a empresa: manifesto, eventos e histórico ficam separados por loja
+        return replace(self, chave=f"{self.chave}@{empresa}", empresa=empresa)
+
+    def resolver(self, referencias):
+        return replace(
+            self,
+            nome=self.nome.format(**referencias),
+            periodo=self.periodo.format(**referencias),
+            assinatura=tuple(a.format(**referencias) for a in self.assinatura),
+        )
+
+
+# Antes de publicar vale só o que é certo para qualquer relatório: planilha legível e inteira e,
+# nos períodos fechados, com linhas (os do período corrente aceitam relatório vazio, ex.: dia 1º).
+# Colunas com nome suposto são exigidas só onde são usadas: trecho/semente do incremental
+# (coluna_data, colunas_chave) e vendedor no comparativo
+RELATORIOS = (
+    EspecRelatorio(
+        "estoque", "estoque", "estoque", "Estoque Atual.xlsx", "{hoje}",
+        remover=5, clique_nativo=True, manter_nome_original=True, min_linhas=1,
+    ),
+    EspecRelatorio(
+        "venda", "venda", "venda", "{ano}_Rel_Venda_Sint_Andre_Sborz.xlsx", "{ano}",
+        remover=5, agrupamento="vendedor", assinatura=("Sint", "01/01/{ano}"),
+    ),
+    EspecRelatorio(
+        "analitico", "venda", "analitico", "{ano}_{mes}_Rel_Venda_Anali_André_Sborz_01-{mes}-{ano}.xlsx", "{ano}-{mes}",
+        tipo_relatorio="2", periodo_myrp="este_mes", assinatura=("Anal", "01/{mes}/{ano}"),
+        incremental=True, coluna_data="Data", colunas_chave=("Documento", "Item"), assinatura_trecho=("Anal", "{desde}"),
+    ),
+    # Analítico mês anterior: só gera de novo se não foi gerado neste mês
+    EspecRelatorio(
+        "analitico_anterior", "venda", "analitico",
+        "{ano_mes_anterior}_{mes_anterior}_Rel_Venda_Anali_André_Sborz_01-{mes_anterior}-{ano_mes_anterior}.xlsx",
+        "{ano_mes_anterior}-{mes_anterior}", validade="mes",
+        tipo_relatorio="2", periodo_myrp="mes_passado", assinatura=("Anal", "01/{mes_anterior}/{ano_mes_anterior}"),
+        min_linhas=1, resumo_so_gerado=True,
+    ),
+    # Venda sintético ano anterior: só gera de novo se não foi gerado neste ano
+    EspecRelatorio(
+        "venda_ano_passado", "venda", "venda", "{ano_passado}_Rel_Venda_Sint_Andre_Sborz.xlsx", "{ano_passado}",
+        validade="ano", agrupamento="vendedor", periodo_myrp="ano_passado", assinatura=("Sint", "01/01/{ano_passado}"),
+        min_linhas=1, resumo_so_gerado=True,
+    ),
+)
+
+
+def referencias(agora):
+    # O ano do mês anterior só muda em janeiro
+    if agora.month == 1:
+        mes_anterior, ano_mes_anterior = 12, agora.year - 1
+    else:
+        mes_anterior, ano_mes_anterior = agora.month - 1, agora.year
+    return {
+        "ano": f"{agora.year}",
+        "mes": f"{agora.month:02d}",
+        "hoje": agora.strftime("%Y-%m-%d"),
+        "mes_anterior": f"{mes_anterior:02d}",
+        "ano_mes_anterior": f"{ano_mes_anterior}",
+        "ano_passado": f"{agora.year - 1}",
+    }
+
+
+def chave_base(chave):
+    return chave.split("@", 1)[0] if chave else chave
+
+
+def pastas_empresa(pastas, empresa):
+    # Cada loja grava numa subpasta própria dentro de cada destino
+    subpasta = re.sub(r'[<>:"/\\|?*]', "_", empresa).strip()
+    return {chave: os.path.join(pasta, subpasta) for chave, pasta in pastas.items()}
+
+
+def caminho_publicado(espec, pastas):
+    return os.path.join(pastas[espec.pasta], espec.nome)
+
+
+def checar(especs, pastas, manifesto, jornada, status, agora):
+    # Registra no manifesto/eventos o que já está atualizado e devolve o que precisa gerar
+    a_gerar = []
+    for espec in especs:
+        retomar_copia(manifesto, jornada, espec, pastas, status)
+        caminho = caminho_publicado(espec, pastas)
+        manifesto.importar_existente(caminho, espec.chave, espec.periodo, espec.validade, agora)
+        if manifesto.atualizado(espec.chave, espec.periodo, espec.validade, agora):
+            status.registrar(espec.chave, "resultado", ATUAL, f"{espec.rotulo} - {MENSAGENS_VALIDADE[espec.validade]}")
+        else:
+            status.registrar(espec.chave, "verificar", PLANEJADO, espec.rotulo)
+            a_gerar.append(espec)
+    return a_gerar
+
+
+# --- Passos na página de relatórios ---
+def _clicar_gerar(driver, status, espec):
+    try:
+        if espec.clique_nativo:
+            gerar_btn = aguardar_clicavel(driver, By.XPATH, XPATH_GERAR, timeout=30)
+            gerar_btn.click()
+        else:
+            gerar_btn = aguardar_presente(driver, By.XPATH, XPATH_GERAR, timeout=10)
+            driver.execute_script("arguments[0].scrollIntoView(true);", gerar_btn)
+            driver.execute_script("arguments[0].click();", gerar_btn)
+        print(f"{espec.chave} - Botão 'Gerar Relatório' clicado.")
+        aguardar_ocioso(driver, descricao="gerar relatório")
+        status.ok(espec.chave, "gerar")
+    except Exception as e:
+        status.erro(espec.chave, "gerar", e)
+        return False
+
+    # Botão "ENTENDI" é opcional
+    try:
+        entendi_btn = aguardar_clicavel(driver, By.XPATH, XPATH_ENTENDI, timeout=5)
+        entendi_btn.click()
+        aguardar_modal_fechado(driver, By.XPATH, XPATH_ENTENDI)
+        status.ok(espec.chave, "entendi")
+    except Exception as e:
+        status.aviso(espec.chave, "entendi", e, "não exibido ou não clicável")
+    return True
+
+
+def _marcar_agrupamento(driver, status, espec):
+    try:
+        radio = aguardar_presente(driver, By.ID, espec.agrupamento, timeout=10)
+        driver.execute_script("arguments[0].scrollIntoView(true);", radio)
+        driver.execute_script(SCRIPT_MARCAR_RADIO, radio)
+        aguardar_ocioso(driver)
+        status.ok(espec.chave, f"radio_{espec.agrupamento}")
+        return True
+    except Exception as e:
+        status.erro(espec.chave, f"radio_{espec.agrupamento}", e)
+        return False
+
+
+def _selecionar(driver, status, espec, etapa_evento, xpath, valor):
+    try:
+        select = aguardar_clicavel(driver, By.XPATH, xpath, timeout=10)
+        driver.execute_script(SCRIPT_SELECIONAR, select, valor)
+        aguardar_ocioso(driver)
+        status.ok(espec.chave, etapa_evento, valor)
+        return True
+    except Exception as e:
+        status.erro(espec.chave, etapa_evento, e, valor)
+        return False
+
+
+def _preencher_periodo(driver, status, espec):
+    # Período personalizado: da data inicial do trecho até hoje
+    if not _selecionar(driver, status, espec, "periodo", XPATH_PERIODO.format(periodo=PERIODO_PERSONALIZADO), PERIODO_PERSONALIZADO):
+        return False
+    hoje = date.today()
+    try:
+        for xpath, dia in ((XPATH_DATA_INICIAL, espec.desde), (XPATH_DATA_FINAL, hoje)):
+            campo = aguardar_clicavel(driver, By.XPATH, xpath, timeout=10)
+            driver.execute_script(SCRIPT_PREENCHER_DATA, campo, dia.isoformat(), dia.strftime("%d/%m/%Y"))
+        aguardar_ocioso(driver)
+        status.ok(espec.chave, "datas", f"{espec.desde:%d/%m/%Y} a {hoje:%d/%m/%Y}")
+        return True
+    except Exception as e:
+        status.erro(espec.chave, "datas", e)
+        return False
+
+
+def solicitar(driver, status, espec):
+    # Agrupamento, tipo e período (o que a definição pedir), depois "Gerar Relatório"
+    if espec.agrupamento and not _marcar_agrupamento(driver, status, espec):
+        return False
+    if espec.tipo_relatorio and not _selecionar(driver, status, espec, "tipo_relatorio", XPATH_TIPO_RELATORIO, espec.tipo_relatorio):
+        return False
+    if espec.desde:
+        if not _preencher_periodo(driver, status, espec):
+            return False
+    elif espec.periodo_myrp and not _selecionar(
+        driver, status, espec, "periodo", XPATH_PERIODO.format(periodo=espec.periodo_myrp), espec.periodo_myrp
+    ):
+        return False
+    return _clicar_gerar(driver, status, espec)
+
+
+# --- Gravação ---
+def _gravar(sessao, manifesto, espec, destino, url, baixar=None):
+    # Conteúdo igual ao já publicado não é reescrito na pasta sincronizada.
+    # baixar: alternativa com o mesmo contrato de baixar_arquivo (ex.: VigiaDownloads.baixar)
+    baixar = baixar or partial(baixar_arquivo, sessao)
+    # Devolve o sha256 e a Leitura da validação (None quando o conteúdo não mudou)
+    leituras = []
+
+    def validar(caminho):
+        leituras.append(validar_planilha(caminho, colunas=espec.colunas, min_linhas=espec.min_linhas))
+    tamanho, sha256, _ = baixar(url, destino, hash_atual=manifesto.hash_de(destino), validar=validar)
+    manifesto.registrar(destino, espec.chave, espec.periodo, tamanho, sha256)
+    return sha256, (leituras[-1] if leituras else None)
+
+
+def _publicar_copia(manifesto, espec, original, publicado, sha256):
+    if manifesto.hash_de(publicado) != sha256 or not os.path.exists(publicado):
+        with etapa(espec.chave, "copiar"):
+            publicar_segundo_nome(original, publicado)
+    manifesto.registrar(publicado, espec.chave, espec.periodo, os.path.getsize(publicado), sha256)
+
+
+def _salvar_trecho(sessao, manifesto, loja, espec, pastas, url, baixar=None):
+    # Baixa só o trecho, mescla no armazém do mês e refaz a planilha publicada a partir dele.
+    # O trecho é um arquivo de trabalho: fica numa pasta temporária local, fora da pasta
+    # sincronizada com a nuvem
+    publicado = caminho_publicado(espec, pastas)
+    pasta_trecho = tempfile.mkdtemp(prefix="myrp_trecho_")
+    trecho = os.path.join(pasta_trecho, espec.nome)
+    baixar = baixar or partial(baixar_arquivo, sessao)
+    colunas = tuple(espec.colunas) + (espec.coluna_data,) + tuple(espec.colunas_chave)
+    try:
+        baixar(url, trecho, validar=partial(validar_planilha, colunas=colunas))
+        with etapa(espec.chave, "mesclar"):
+            cabecalho, linhas = separar_cabecalho(ler_linhas(trecho), colunas)
+            loja.mesclar(espec.chave, espec.periodo, cabecalho, linhas,
+                         espec.coluna_data, espec.colunas_chave, inicio=espec.desde)
+    except CabecalhoDiferente:
+        # Colunas mudaram no MyRP: o mês é semeado de novo com o relatório completo na próxima execução
+        loja.apagar(espec.chave, espec.periodo)
+        raise
+    finally:
+        shutil.rmtree(pasta_trecho, ignore_errors=True)
+    with etapa(espec.chave, "refazer_planilha"):
+        cabecalho, linhas = loja.ler(espec.chave, espec.periodo)
+        escrever_planilha(publicado, cabecalho, linhas)
+    sha256 = hash_arquivo(publicado)
+    manifesto.registrar(publicado, espec.chave, espec.periodo, os.path.getsize(publicado), sha256)
+    return sha256
+
+
+def salvar(sessao, manifesto, jornada, espec, pastas, url, baixar=None, loja=None, armazem=None):
+    publicado = caminho_publicado(espec, pastas)
+    # Subpastas das lojas são criadas no primeiro download
+    os.makedirs(pastas[espec.pasta], exist_ok=True)
+    semente = None
+    if espec.desde and loja is not None:
+        sha256, leitura = _salvar_trecho(sessao, manifesto, loja, espec, pastas, url, baixar), None
+    elif not espec.manter_nome_original:
+        sha256, leitura = _gravar(sessao, manifesto, espec, publicado, url, baixar)
+        if espec.incremental:
+            semente = loja
+    else:
+        # Mantém o nome original na pasta e publica o mesmo arquivo com o segundo nome
+        original = os.path.join(pastas[espec.pasta], nome_arquivo_url(url))
+        sha256, leitura = _gravar(sessao, manifesto, espec, original, url, baixar)
+        jornada.marcar(espec.chave, espec.periodo, BAIXADO, arquivo=original, sha256=sha256)
+        _publicar_copia(manifesto, espec, original, publicado, sha256)
+        jornada.marcar(espec.chave, espec.periodo, COPIADO)
+    jornada.concluir(espec.chave)
+    _ingerir(espec, publicado, sha256, leitura, semente, armazem)
+
+
+def _ingerir(espec, publicado, sha256, leitura, loja=None, armazem=None):
+    # Uma leitura do relatório publicado alimenta, lote a lote, a cópia colunar, a semente do
+    # incremental (loja) e o armazém; os tipos da cópia colunar vêm da validação (leitura).
+    # São atalhos para quem consome: falhar num destino não invalida o relatório nem os outros
+    relatorio = chave_base(espec.chave)
+    candidatos = []
+    if not colunar_atualizado(publicado, sha256):
+        candidatos.append(("gravar cópia colunar", lambda: EscritorColunar(publicado, sha256, leitura)))
+    if loja is not None:
+        candidatos.append(("semear o armazém do mês", lambda: _iniciar_semente(loja, espec, leitura)))
+    if armazem is not None and not armazem.carregado(relatorio, espec.empresa or armazem.empresa_padrao, espec.periodo, sha256):
+        candidatos.append(("carregar no armazém", lambda: armazem.iniciar_carga(
+            publicado, leitura.cabecalho, espec.pasta, relatorio, espec.periodo, sha256, espec.empresa,
+        )))
+    if not candidatos:
+        return
+    with etapa(espec.chave, "ingerir"):
+        if leitura is None:
+            # Conteúdo que não passou pela validação agora (ex.: refeito a partir do incremental)
+            leitura = ler_planilha(publicado)
+            if leitura is None:
+                print(f"{espec.chave} - Cabeçalho não encontrado em {os.path.basename(publicado)}")
+                return
+        destinos = []
+        for descricao, iniciar in candidatos:
+            try:
+                destino = iniciar()
+            except Exception as e:
+                print(f"{espec.chave} - Erro ao {descricao}: {e}")
+                continue
+            if destino is not None:
+                destinos.append((descricao, destino))
+        if not destinos:
+            return
+        try:
+            for lote in em_lotes(leitura.reler(publicado)):
+                for descricao, destino in list(destinos):
+                    try:
+                        destino.escrever(lote)
+                    except Exception as e:
+                        print(f"{espec.chave} - Erro ao {descricao}: {e}")
+                        destinos.remove((descricao, destino))
+                        destino.cancelar()
+                if not destinos:
+                    return
+        except BaseException:
+            for _, destino in destinos:
+                destino.cancelar()
+            raise
+        for descricao, destino in destinos:
+            try:
+                destino.concluir()
+            except Exception as e:
+                print(f"{espec.chave} - Erro ao {descricao}: {e}")
+
+
+def _iniciar_semente(loja, espec, leitura):
+    # Mês baixado completo: vira a base do incremental (se tiver as colunas de data e chave)
+    faltando = [c for c in (espec.coluna_data,) + tuple(espec.colunas_chave) if indice_coluna(leitura.cabecalho, c) is None]
+    if faltando:
+        print(f"{espec.chave} - Incremental indisponível, colunas ausentes: {', '.join(faltando)}")
+        return None
+    return loja.iniciar_mesclagem(espec.chave, espec.periodo, leitura.cabecalho, espec.coluna_data, espec.colunas_chave)
+
+
+def atualizar_comparativo(especs, pastas, manifesto, armazem=None):
+    # Comparativo ano a ano das vendas sintéticas (venda x venda_ano_passado) de uma empresa;
+    # roda mesmo quando nada foi baixado, mas só refaz se uma das duas planilhas mudou
+    por_chave = {chave_base(espec.chave): espec for espec in especs}
+    atual, anterior = por_chave.get("venda"), por_chave.get("venda_ano_passado")
+    if atual is None or anterior is None:
+        return
+    caminhos = [caminho_publicado(espec, pastas) for espec in (atual, anterior)]
+    if not all(os.path.exists(caminho) for caminho in caminhos):
+        return
+    destino = os.path.join(pastas[atual.pasta], NOME_COMPARATIVO.format(ano=atual.periodo, ano_passado=anterior.periodo))
+    try:
+        with etapa(atual.chave, "comparativo"):
+            shas = [manifesto.hash_de(caminho) or hash_arquivo(caminho) for caminho in caminhos]
+            refeito = comparar(caminhos[0], shas[0], caminhos[1], shas[1], destino)
+            if refeito and armazem is not None and os.path.exists(destino):
+                armazem.carregar(destino, "comparativo", "comparativo_anual", atual.periodo, hash_arquivo(destino), atual.empresa)
+    except Exception as e:
+        print(f"{atual.chave} - Erro ao gerar o comparativo anual: {e}")
+
+
+def retomar_copia(manifesto, jornada, espec, pastas, status):
+    # Baixado mas não copiado (queda entre as duas etapas): o manifesto já vê o original
+    # como atual, então a cópia é refeita aqui, sem navegador
+    baixado = jornada.estado(espec.chave, espec.periodo).get(BAIXADO)
+    if not baixado or not espec.manter_nome_original:
+        return
+    try:
+        _publicar_copia(manifesto, espec, baixado["arquivo"], caminho_publicado(espec, pastas), baixado["sha256"])
+        jornada.concluir(espec.chave)
+        status.ok(espec.chave, "retomar", "cópia concluída")
+    except OSError as e:
+        status.erro(espec.chave, "retomar", e, "cópia")
+        jornada.descartar(espec.chave)
+
+
+def preparar_incremental(espec, loja):
+    # Com o mês já no armazém, pede só a partir da última data (inclusive: o dia pode estar incompleto)
+    if not espec.incremental or loja is None:
+        return espec
+    desde = loja.ultima_data(espec.chave, espec.periodo)
+    if desde is None:
+        return espec
+    return replace(espec, desde=desde, assinatura=tuple(a.format(desde=f"{desde:%d/%m/%Y}") for a in espec.assinatura_trecho))
+
+
+def executar(driver, especs, pastas, sessao, manifesto, jornada, status, data_hoje, prazo, *, limite=None, vigia=None, loja=None, armazem=None, cdp=False, api=None, bloquear=False):
+    # limite: máximo de abas abertas ao mesmo tempo; acima disso os relatórios rodam em lotes.
+    # vigia: downloads pelo navegador quando a sessão HTTP é recusada.
+    # loja: armazém do mês para os relatórios incrementais (None = sempre o mês inteiro).
+    # armazem: banco local onde cada relatório baixado é carregado (None = não carrega).
+    # cdp: acompanha as abas pelo núcleo assíncrono em vez de uma a uma pelo Selenium.
+    # api: registro do endpoint da lista de relatórios (consultado direto, sem a página)
+    # bloquear: imagens/fontes bloqueadas em cada aba aberta (modo desacompanhado)
+    especs = [preparar_incremental(espec, loja) for espec in especs]
+    tarefas = [
+        {
+            "chave": espec.chave, "nome": espec.rotulo, "url": espec.url, "remover": espec.remover,
+            "solicitar": partial(solicitar, espec=espec),
+            "salvar": partial(salvar, sessao, manifesto, jornada, espec, pastas, loja=loja, armazem=armazem),
+            "salvar_navegador": partial(salvar, sessao, manifesto, jornada, espec, pastas, baixar=vigia.baixar, loja=loja, armazem=armazem) if vigia else None,
+            "assinatura": list(espec.assinatura), "periodo": espec.periodo_pedido, "empresa": espec.empresa,
+        }
+        for espec in especs
+    ]
+    limite = limite or len(tarefas) or 1
+    resultado = {}
+    for inicio in range(0, len(tarefas), limite):
+        resultado.update(gerar_em_paralelo(
+            driver, tarefas[inicio:inicio + limite], status, data_hoje, prazo,
+            jornada=jornada, cdp=cdp, sessao=sessao, api=api, bloquear=bloquear,
+        ))
+    return resultado
@@ -0,0 +1,90 @@
+import random
+from time import sleep
+
+from selenium.common.exceptions import WebDriverException
+
+from perfil import perfil
+
+# Política de retentativas das etapas de navegação (login, seleção/troca de empresa):
+# repete a etapa no mesmo processo e no mesmo navegador, com backoff, e abre o circuito
+# da etapa após falhas seguidas. Só quando o navegador não responde mais a etapa desiste
+# com SessaoQuebrada, para quem chamou iniciar outro driver.
+
+
+class SessaoQuebrada(Exception):
+    pass
+
+
+class Politica:
+    def __init__(self, tentativas=3, espera=2.0, fator=2.0, espera_maxima=20.0):
+        self.tentativas = tentativas
+        self.espera_inicial = espera
+        self.fator = fator
+        self.espera_maxima = espera_maxima
+
+    def espera(self, tentativa):
+        # tentativa 2 espera o valor inicial, depois cresce pelo fator (jitter de ±20%)
+        base = min(self.espera_inicial * self.fator ** (tentativa - 2), self.espera_maxima)
+        return base * random.uniform(0.8, 1.2)
+
+
+class Disjuntor:
+    # Conta operações que falharam mesmo após todas as tentativas, por etapa.
+    # Com o circuito aberto a etapa falha na hora (ex.: lojas restantes do lote).
+    def __init__(self, limite=3):
+        self.limite = limite
+        self.falhas = {}
+
+    def aberto(self, etapa):
+        return self.falhas.get(etapa, 0) >= self.limite
+
+    def sucesso(self, etapa):
+        self.falhas[etapa] = 0
+
+    def falha(self, etapa):
+        self.falhas[etapa] = self.falhas.get(etapa, 0) + 1
+
+
+POLITICA_PADRAO = Politica()
+DISJUNTOR = Disjuntor()
+
+
+def navegador_vivo(driver):
+    try:
+        driver.execute_script("return 1")
+        return True
+    except WebDriverException:
+        return False
+
+
+def repetir(driver, etapa, tentar, status, politica=POLITICA_PADRAO, disjuntor=DISJUNTOR, recuperar=None):
+    # tentar() devolve True/False, como as etapas do fluxo; recuperar() prepara a página
+    # para a próxima tentativa (ex.: reabrir o modal de empresas)
+    if disjuntor.aberto(etapa):
+        status.erro(None, etapa, detalhe=f"circuito aberto após {disjuntor.limite} falhas seguidas")
+        return False
+    for tentativa in range(1, politica.tentativas + 1):
+        if tentativa > 1:
+            if not navegador_vivo(driver):
+                raise SessaoQuebrada(f"{etapa}: navegador não responde")
+            espera = politica.espera(tentativa)
+            print(f"[retentativa] {etapa}: tentativa {tentativa}/{politica.tentativas} em {espera:.1f}s")
+            sleep(espera)
+            if recuperar is not None and not recuperar():
+                perfil.tentativa()
+                continue
+        perfil.tentativa()
+        try:
+            sucesso = tentar()
+        except WebDriverException as e:
+            # Falha do navegador dentro da etapa conta como tentativa perdida; se ele parou de
+            # responder, a próxima volta (ou o fim) levanta SessaoQuebrada
+            print(f"[retentativa] {etapa}: {type(e).__name__}: {e}")
+            sucesso = False
+        if sucesso:
+            disjuntor.sucesso(etapa)
+            return True
+    disjuntor.falha(etapa)
+    if not navegador_vivo(driver):
+        raise SessaoQuebrada(f"{etapa}: navegador não responde")
+    return False
@@ -0,0 +1,79 @@
+import json
+import os
+import time
+
+from selenium.webdriver.common.by import By
+
+from esperas import aguardar_pagina
+
+# Cache da sessão autenticada (cookies + localStorage) para pular login e seleção de empresa.
+# É só um atalho: qualquer falha ao restaurar cai no login normal.
+
+ARQUIVO_SESSAO = os.path.join(os.path.expanduser("~"), ".myrp_sessao.json")
+IDADE_MAXIMA = 12 * 60 * 60
+
+
+def salvar_sessao(driver, empresa, caminho=ARQUIVO_SESSAO):
+    dados = {
+        "salvo_em": time.time(),
+        "empresa": empresa,
+        "url": driver.current_url,
+        "cookies": driver.get_cookies(),
+        "local_storage": driver.execute_script("return Object.assign({}, window.localStorage);"),
+    }
+    temporario = caminho + ".tmp"
+    # Contém cookies de sessão: só o próprio usuário pode ler
+    fd = os.open(temporario, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(dados, f)
+    os.replace(temporario, caminho)
+
+
+def apagar_sessao(caminho=ARQUIVO_SESSAO):
+    try:
+        os.remove(caminho)
+    except FileNotFoundError:
+        pass
+
+
+def _carregar(caminho, empresa):
+    try:
+        with open(caminho, encoding="utf-8") as f:
+            dados = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if dados.get("empresa") != empresa or time.time() - dados.get("salvo_em", 0) > IDADE_MAXIMA:
+        return None
+    return dados
+
+
+def sessao_valida(driver):
+    # Sessão expirada redireciona para a tela de login
+    return "login" not in driver.current_url.lower() and not driver.find_elements(By.ID, "usuario")
+
+
+def restaurar_sessao(driver, empresa, caminho=ARQUIVO_SESSAO):
+    dados = _carregar(caminho, empresa)
+    if not dados:
+        return False
+    try:
+        # Cookies só podem ser definidos estando no domínio deles
+        driver.get(dados["url"])
+        driver.delete_all_cookies()
+        for cookie in dados["cookies"]:
+            cookie.pop("sameSite", None)
+            if "expiry" in cookie:
+                cookie["expiry"] = int(cookie["expiry"])
+            driver.add_cookie(cookie)
+        driver.execute_script(
+            "var itens = arguments[0]; for (var k in itens) { window.localStorage.setItem(k, itens[k]); }",
+            dados["local_storage"],
+        )
+        driver.get(dados["url"])
+        aguardar_pagina(driver, descricao="restaurar sessão")
+        if sessao_valida(driver):
+            return True
+    except Exception as e:
+        print(f"Sessão em cache inválida: {e}")
+    apagar_sessao(caminho)
+    return False
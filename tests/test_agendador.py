@@ -0,0 +1,128 @@
+import asyncio
+from time import monotonic
+
+import pytest
+
+pytest.importorskip("selenium")
+
+from agendador import _escolher_entrada, _pronto_na_lista, _acompanhar_async  # noqa: E402
+
+HOJE = "18/10/2026"
+URL_VENDA = "https://hering.myrp.app/app/gerencial/relatorios/relatoriosAvancados/gerar/?tipo=venda"
+
+SINTETICO = {"data": f"{HOJE} 09:00", "href": "https://blob/sint.xlsx", "texto": "Venda Sint 01/01/2026"}
+ANALITICO = {"data": f"{HOJE} 09:01", "href": "https://blob/anal.xlsx", "texto": "Venda Anal 01/10/2026"}
+ONTEM = {"data": "17/10/2026 09:00", "href": "https://blob/ontem.xlsx", "texto": "Venda Sint 01/01/2026"}
+
+
+def _tarefa(chave, assinatura, conhecidos=()):
+    return {"chave": chave, "url": URL_VENDA, "assinatura": list(assinatura), "conhecidos": set(conhecidos)}
+
+
+def test_escolhe_pela_assinatura_completa():
+    venda = _tarefa("venda", ("Sint", "01/01/2026"))
+    analitico = _tarefa("analitico", ("Anal", "01/10/2026"))
+    entradas = [ONTEM, ANALITICO, SINTETICO]
+    assert _escolher_entrada(entradas, venda, HOJE, set(), [venda, analitico]) is SINTETICO
+    assert _escolher_entrada(entradas, analitico, HOJE, set(), [venda, analitico]) is ANALITICO
+
+
+def test_ignora_conhecidos_e_reivindicados():
+    venda = _tarefa("venda", ("Sint",), conhecidos={SINTETICO["href"]})
+    assert _escolher_entrada([SINTETICO], venda, HOJE, set(), [venda]) is None
+    venda = _tarefa("venda", ("Sint",))
+    assert _escolher_entrada([SINTETICO], venda, HOJE, {SINTETICO["href"]}, [venda]) is None
+
+
+def test_assinatura_parcial_com_outro_pedido_na_mesma_lista():
+    # O analítico ainda não apareceu: a entrada nova não pode ser tomada pela venda
+    venda = _tarefa("venda", ("Sint", "01/01/2026"))
+    analitico = _tarefa("analitico", ("Anal", "01/10/2026"))
+    assert _escolher_entrada([ANALITICO], venda, HOJE, set(), [venda, analitico]) is None
+
+
+def test_assinatura_parcial_sem_outro_pedido_na_lista():
+    # Único pedido da lista: vale a melhor entrada nova, mesmo com o texto diferente
+    venda = _tarefa("venda", ("Sintético", "01/01/2026"))
+    assert _escolher_entrada([SINTETICO], venda, HOJE, set(), [venda]) is SINTETICO
+
+
+def test_pronto_na_lista_so_com_assinatura_e_da_mesma_loja():
+    estoque = {"data": f"{HOJE} 08:00", "href": "https://blob/estoque.xlsx", "texto": "Estoque Loja Norte"}
+    assert _pronto_na_lista([estoque], _tarefa("estoque", ()), HOJE, set()) is None
+    venda = _tarefa("venda@Loja Centro", ("Sint", "01/01/2026"))
+    venda["empresa"] = "Loja Centro"
+    assert _pronto_na_lista([SINTETICO], venda, HOJE, set()) is None
+    assert _pronto_na_lista([dict(SINTETICO, texto="Venda Sint 01/01/2026 Loja Centro")], venda, HOJE, set())
+    assert _pronto_na_lista([SINTETICO], _tarefa("venda", ("Sint", "01/01/2026")), HOJE, set()) is SINTETICO
+
+
+class _Prontidao:
+    def __init__(self):
+        self.proxima = monotonic()
+
+    def vencida(self):
+        return False
+
+    def deve_verificar(self, agora):
+        return agora >= self.proxima
+
+    def nao_pronto(self):
+        self.proxima = monotonic() + 0.01
+
+
+class _API:
+    def chamada(self, empresa, pagina):
+        return {"metodo": "GET", "url": pagina} if pagina == URL_VENDA else None
+
+
+class _Sessao:
+    # Endpoint da lista: o sintético só aparece na quinta consulta
+    def __init__(self):
+        self.consultas = 0
+
+    def request(self, metodo, url, data, headers, timeout):
+        self.consultas += 1
+        link = "https://myrp.blob.core.windows.net/relatorios/sint.xlsx"
+        itens = [{"data": HOJE, "link": link, "nome": "Venda Sint 01/01/2026"}] if self.consultas >= 5 else []
+        return type("Resposta", (), {"raise_for_status": lambda s: None, "json": lambda s: {"itens": itens}})()
+
+
+class _Driver:
+    # Lista do estoque pelo Selenium: pronta na segunda leitura
+    def __init__(self):
+        self.leituras = 0
+        self.switch_to = type("Troca", (), {"window": lambda s, aba: None})()
+
+    def execute_script(self, script):
+        self.leituras += 1
+        return [{"data": HOJE, "href": "https://blob/estoque.xlsx", "texto": "Estoque"}] if self.leituras >= 2 else []
+
+    def find_element(self, *args):
+        return type("Icone", (), {"click": lambda s: None})()
+
+
+def test_abas_pelo_selenium_seguem_junto_com_as_assincronas():
+    venda = dict(_tarefa("venda", ("Sint", "01/01/2026")), prontidao=_Prontidao())
+    estoque = dict(chave="estoque", url="https://myrp/estoque", assinatura=[], conhecidos=set(), aba="aba", prontidao=_Prontidao())
+    pendentes = [venda, estoque]
+    ordem = []
+
+    def encontrado(tarefa, entrada):
+        ordem.append(tarefa["chave"])
+        pendentes.remove(tarefa)
+
+    def conferir(tarefa, entradas):
+        entrada = _escolher_entrada(entradas, tarefa, HOJE, set(), pendentes)
+        if entrada:
+            encontrado(tarefa, entrada)
+            return False
+        tarefa["prontidao"].nao_pronto()
+        return True
+
+    asyncio.run(_acompanhar_async(
+        None, pendentes, HOJE, set(), encontrado, None, sessao=_Sessao(), api=_API(), driver=_Driver(), conferir=conferir,
+    ))
+    # O estoque não espera o fim do acompanhamento pelo endpoint
+    assert ordem == ["estoque", "venda"]
+    assert pendentes == []
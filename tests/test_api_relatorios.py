@@ -0,0 +1,52 @@
+from api_relatorios import RegistroAPI, extrair_entradas, pronta
+
+BLOB = "https://myrp.blob.core.windows.net/relatorios"
+
+
+def test_extrair_entradas_de_json_aninhado():
+    dados = {
+        "sucesso": True,
+        "dados": {
+            "itens": [
+                {"nome": "Venda Sint 01/01/2026 a 18/10/2026", "criadoEm": "2026-10-18T09:12:00", "link": f"{BLOB}/a.xlsx", "Status": "Concluído"},
+                {"nome": "Rel André", "dataGeracao": "17/10/2026 18:00", "arquivo": f"{BLOB}/Rel André.xlsx?sv=1&sig=a%2Bb"},
+                {"nome": "sem arquivo", "data": "18/10/2026"},
+            ],
+        },
+    }
+    assert extrair_entradas(dados) == [
+        {
+            "data": "18/10/2026", "href": f"{BLOB}/a.xlsx", "status": "Concluído",
+            "texto": f"Venda Sint 01/01/2026 a 18/10/2026 2026-10-18T09:12:00 {BLOB}/a.xlsx Concluído",
+        },
+        {
+            # Link na mesma forma do a.href do DOM (percent-encoded, sem recodificar o que já estava)
+            "data": "17/10/2026", "href": f"{BLOB}/Rel%20Andr%C3%A9.xlsx?sv=1&sig=a%2Bb", "status": None,
+            "texto": f"Rel André 17/10/2026 18:00 {BLOB}/Rel André.xlsx?sv=1&sig=a%2Bb",
+        },
+    ]
+
+
+def test_extrair_entradas_sem_relatorios():
+    assert extrair_entradas({"itens": [], "total": 0}) == []
+    assert extrair_entradas(None) == []
+
+
+def test_so_relatorios_terminados_sao_candidatos():
+    assert pronta({"status": "Concluído"})
+    assert pronta({"status": None})
+    assert not pronta({"status": "Processando"})
+    assert not pronta({"status": "Não concluído"})
+
+
+def test_chamadas_separadas_por_empresa(tmp_path):
+    caminho = str(tmp_path / "api.json")
+    registro = RegistroAPI(caminho, empresa_padrao="Loja Centro")
+    chamada = {"metodo": "GET", "url": "https://myrp/api/lista", "cabecalhos": {"Authorization": "Bearer x"}}
+    registro.gravar(None, "/relatorios", chamada)
+    assert registro.chamada("Loja Centro", "/relatorios")["cabecalhos"] == {"Authorization": "Bearer x"}
+    assert registro.chamada("Loja Norte", "/relatorios") is None
+    # Credencial fica só em memória
+    assert RegistroAPI(caminho, empresa_padrao="Loja Centro").chamada(None, "/relatorios")["cabecalhos"] == {}
+    registro.esquecer("Loja Centro", "/relatorios")
+    assert RegistroAPI(caminho).chamada("Loja Centro", "/relatorios") is None
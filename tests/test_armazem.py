@@ -0,0 +1,56 @@
+from datetime import datetime
+
+import pytest
+
+from armazem import Armazem
+
+openpyxl = pytest.importorskip("openpyxl")
+
+
+@pytest.fixture
+def armazem(tmp_path):
+    armazem = Armazem(str(tmp_path / "armazem.sqlite"), empresa_padrao="Loja Centro")
+    yield armazem
+    armazem.fechar()
+
+
+def _planilha(caminho, linhas):
+    pasta = openpyxl.Workbook()
+    for linha in [["Relatório de vendas analítico"]] + linhas:
+        pasta.active.append(linha)
+    pasta.save(caminho)
+    return str(caminho)
+
+
+def _linhas(armazem, empresa="Loja Centro"):
+    return armazem.consultar(
+        "SELECT data_ref, vendedor_ref, documento, valor FROM analitico WHERE empresa = ? ORDER BY documento", (empresa,)
+    )[1]
+
+
+def test_carregar_e_idempotente_por_conteudo(armazem, tmp_path):
+    caminho = _planilha(tmp_path / "analitico.xlsx", [
+        ["Data", "Vendedor", "Documento", "Valor"],
+        [datetime(2026, 10, 1, 10, 0), "Ana", "NF 1", 10.0],
+        ["02/10/2026", "Bia", "NF 2", 20.0],
+    ])
+    assert armazem.carregar(caminho, "analitico", "analitico", "2026-10", "sha-1") == 2
+    assert armazem.carregar(caminho, "analitico", "analitico", "2026-10", "sha-1") == 0
+    assert _linhas(armazem) == [("2026-10-01", "Ana", "NF 1", 10.0), ("2026-10-02", "Bia", "NF 2", 20.0)]
+
+
+def test_conteudo_novo_troca_a_particao(armazem, tmp_path):
+    primeira = _planilha(tmp_path / "primeira.xlsx", [
+        ["Data", "Vendedor", "Documento", "Valor"], ["01/10/2026", "Ana", "NF 1", 10.0], ["01/10/2026", "Ana", "NF 2", 5.0],
+    ])
+    segunda = _planilha(tmp_path / "segunda.xlsx", [
+        ["Data", "Vendedor", "Documento", "Valor", "Desconto"], ["01/10/2026", "Ana", "NF 1", 12.0, 1.0],
+    ])
+    armazem.carregar(primeira, "analitico", "analitico", "2026-10", "sha-1")
+    armazem.carregar(primeira, "analitico", "analitico", "2026-10", "sha-1", empresa="Loja Norte")
+    # Coluna nova no MyRP entra na tabela; a partição da outra loja fica como estava
+    assert armazem.carregar(segunda, "analitico", "analitico", "2026-10", "sha-2") == 1
+    assert _linhas(armazem) == [("2026-10-01", "Ana", "NF 1", 12.0)]
+    assert len(_linhas(armazem, "Loja Norte")) == 2
+    cargas = armazem.consultar("SELECT empresa, sha256, linhas FROM cargas ORDER BY empresa")[1]
+    assert cargas == [("Loja Centro", "sha-2", 1), ("Loja Norte", "sha-1", 2)]
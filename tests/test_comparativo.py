@@ -0,0 +1,56 @@
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("pandas")
+openpyxl = pytest.importorskip("openpyxl")
+
+from comparativo import calcular, PERIODO_ACUMULADO  # noqa: E402
+
+
+def _planilha(caminho, linhas):
+    pasta = openpyxl.Workbook()
+    planilha = pasta.active
+    planilha.append(["Relatório de venda por vendedor"])
+    for linha in linhas:
+        planilha.append(linha)
+    pasta.save(caminho)
+    return str(caminho)
+
+
+def test_calcular_por_mes(tmp_path):
+    atual = _planilha(tmp_path / "atual.xlsx", [
+        ["Vendedor", "Data", "Cód. Vendedor", "Valor"],
+        ["Ana", datetime(2026, 1, 10), 1, 150.0],
+        ["Ana", datetime(2026, 2, 10), 1, 50.0],
+        ["Bia", datetime(2026, 1, 5), 2, 30.0],
+        ["Total", None, None, 230.0],
+    ])
+    anterior = _planilha(tmp_path / "anterior.xlsx", [
+        ["Vendedor", "Data", "Cód. Vendedor", "Valor"],
+        ["Ana", datetime(2025, 1, 3), 1, 100.0],
+        ["Ana", datetime(2025, 2, 3), 1, 100.0],
+    ])
+    tabela = calcular(atual, anterior)
+    assert list(tabela["vendedor"]) == ["Ana", "Ana", "Bia"]
+    assert list(tabela["periodo"]) == ["01", "02", "01"]
+    # Identificador (código do vendedor) não é métrica; linha de total não é vendedor
+    assert "Cód. Vendedor atual" not in tabela.columns
+    assert list(tabela["Valor atual"]) == [150.0, 50.0, 30.0]
+    assert list(tabela["Valor anterior"]) == [100.0, 100.0, 0.0]
+    assert list(tabela["Valor diferença"]) == [50.0, -50.0, 30.0]
+    assert list(tabela["Valor crescimento"][:2]) == [0.5, -0.5]
+    # Sem venda no ano passado o crescimento fica vazio
+    assert tabela["Valor crescimento"].isna()[2]
+    assert list(tabela["Valor acumulado atual"]) == [150.0, 200.0, 30.0]
+    assert list(tabela["Valor acumulado anterior"]) == [100.0, 200.0, 0.0]
+
+
+def test_calcular_sem_mes_nao_calcula_crescimento(tmp_path):
+    # Ano atual até hoje contra o ano passado inteiro: os dois não são comparáveis em taxa
+    atual = _planilha(tmp_path / "atual.xlsx", [["Vendedor", "Valor"], ["Ana", 80.0]])
+    anterior = _planilha(tmp_path / "anterior.xlsx", [["Vendedor", "Valor"], ["Ana", 100.0]])
+    tabela = calcular(atual, anterior)
+    assert list(tabela["periodo"]) == [PERIODO_ACUMULADO]
+    assert list(tabela["Valor diferença"]) == [-20.0]
+    assert tabela["Valor crescimento"].isna().all()
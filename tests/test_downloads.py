@@ -0,0 +1,106 @@
+import hashlib
+import os
+
+import pytest
+import requests
+
+from downloads import baixar_arquivo, precisa_navegador, normalizar_url, nome_arquivo_url
+
+URL = "https://myrp.blob.core.windows.net/relatorios/Rel%20Andr%C3%A9.xlsx?sig=x"
+
+
+class Resposta:
+    def __init__(self, corpo, cabecalhos=None, status=200):
+        self.corpo = corpo
+        self.headers = {"Content-Length": str(len(corpo))} if cabecalhos is None else cabecalhos
+        self.status_code = status
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *erro):
+        return False
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code}", response=self)
+
+    def iter_content(self, chunk_size):
+        for i in range(0, len(self.corpo), 3):
+            yield self.corpo[i:i + 3]
+
+
+class Sessao:
+    def __init__(self, resposta):
+        self.resposta = resposta
+
+    def get(self, url, stream, timeout):
+        return self.resposta
+
+
+def _temporarios(pasta):
+    return [n for n in os.listdir(pasta) if n.endswith(".part")]
+
+
+def test_baixa_e_publica(tmp_path):
+    destino = str(tmp_path / "venda.xlsx")
+    tamanho, sha256, gravado = baixar_arquivo(Sessao(Resposta(b"conteudo novo")), URL, destino)
+    assert (tamanho, sha256, gravado) == (13, hashlib.sha256(b"conteudo novo").hexdigest(), True)
+    assert open(destino, "rb").read() == b"conteudo novo"
+    assert _temporarios(tmp_path) == []
+
+
+def test_conteudo_igual_nao_reescreve(tmp_path):
+    destino = tmp_path / "venda.xlsx"
+    destino.write_bytes(b"mesmo")
+    os.utime(destino, (0, 0))
+    validados = []
+    _, _, gravado = baixar_arquivo(
+        Sessao(Resposta(b"mesmo")), URL, str(destino),
+        hash_atual=hashlib.sha256(b"mesmo").hexdigest(), validar=validados.append,
+    )
+    assert not gravado
+    assert os.path.getmtime(destino) == 0
+    # Conteúdo já publicado não é validado de novo
+    assert validados == []
+    assert _temporarios(tmp_path) == []
+
+
+def test_tamanho_diferente_do_content_length_nao_publica(tmp_path):
+    destino = tmp_path / "venda.xlsx"
+    destino.write_bytes(b"anterior")
+    with pytest.raises(IOError, match="incompleto"):
+        baixar_arquivo(Sessao(Resposta(b"cortado", {"Content-Length": "100"})), URL, str(destino))
+    assert destino.read_bytes() == b"anterior"
+    assert _temporarios(tmp_path) == []
+
+
+def test_content_encoding_dispensa_o_content_length(tmp_path):
+    destino = str(tmp_path / "venda.xlsx")
+    resposta = Resposta(b"descomprimido", {"Content-Length": "5", "Content-Encoding": "gzip"})
+    assert baixar_arquivo(Sessao(resposta), URL, destino)[2]
+
+
+def test_validacao_recusada_nao_publica(tmp_path):
+    destino = tmp_path / "venda.xlsx"
+
+    def recusar(caminho):
+        raise ValueError("planilha truncada")
+    with pytest.raises(ValueError):
+        baixar_arquivo(Sessao(Resposta(b"lixo")), URL, str(destino), validar=recusar)
+    assert not destino.exists()
+    assert _temporarios(tmp_path) == []
+
+
+def test_acesso_negado_vai_para_o_navegador(tmp_path):
+    with pytest.raises(requests.HTTPError) as erro:
+        baixar_arquivo(Sessao(Resposta(b"", status=403)), URL, str(tmp_path / "venda.xlsx"))
+    assert precisa_navegador(erro.value)
+    assert _temporarios(tmp_path) == []
+    assert not precisa_navegador(requests.HTTPError("500", response=Resposta(b"", status=500)))
+
+
+def test_links_do_dom_e_da_api_na_mesma_forma():
+    assert normalizar_url(URL) == URL
+    assert normalizar_url(URL.replace("%20", " ").replace("%C3%A9", "é")) == URL
+    assert nome_arquivo_url(URL) == "Rel André.xlsx"
@@ -0,0 +1,59 @@
+from datetime import date, datetime
+
+import pytest
+
+from incremental import LojaMensal, CabecalhoDiferente
+
+CABECALHO = ["Data", "Documento", "Item", "Valor"]
+
+
+@pytest.fixture
+def loja(tmp_path):
+    loja = LojaMensal(str(tmp_path / "mensal.sqlite"))
+    yield loja
+    loja.fechar()
+
+
+def _ler(loja):
+    cabecalho, linhas = loja.ler("analitico", "2026-10")
+    return cabecalho, list(linhas)
+
+
+def test_mesclar_troca_o_trecho_desde_o_inicio(loja):
+    loja.mesclar("analitico", "2026-10", CABECALHO, [
+        [datetime(2026, 10, 1), "NF 1", 1, 10.0],
+        [datetime(2026, 10, 2), "NF 2", 1, 20.0],
+        [datetime(2026, 10, 3), "NF 3", 1, 30.0],
+    ], "Data", ("Documento", "Item"))
+    # Trecho a partir do dia 2: NF 2 mudou, NF 3 foi cancelada, NF 4 é nova
+    loja.mesclar("analitico", "2026-10", CABECALHO, [
+        [datetime(2026, 10, 2), "NF 2", 1, 25.0],
+        [datetime(2026, 10, 4), "NF 4", 1, 40.0],
+    ], "Data", ("Documento", "Item"), inicio=date(2026, 10, 2))
+    assert _ler(loja) == (CABECALHO, [
+        [datetime(2026, 10, 1), "NF 1", 1, 10.0],
+        [datetime(2026, 10, 2), "NF 2", 1, 25.0],
+        [datetime(2026, 10, 4), "NF 4", 1, 40.0],
+    ])
+
+
+def test_mesclar_mantem_linhas_repetidas(loja):
+    linha = [datetime(2026, 10, 1), "NF 1", 1, 10.0]
+    loja.mesclar("analitico", "2026-10", CABECALHO, [linha, linha], "Data", ("Documento", "Item"))
+    assert _ler(loja)[1] == [linha, linha]
+
+
+def test_mesclar_recusa_cabecalho_diferente(loja):
+    loja.mesclar("analitico", "2026-10", CABECALHO, [[datetime(2026, 10, 1), "NF 1", 1, 10.0]], "Data", ("Documento", "Item"))
+    with pytest.raises(CabecalhoDiferente):
+        loja.mesclar("analitico", "2026-10", CABECALHO + ["Loja"], [], "Data", ("Documento", "Item"), inicio=date(2026, 10, 2))
+
+
+def test_ler_mes_inexistente(loja):
+    assert _ler(loja) == (None, [])
+
+
+def test_colunas_pelo_nome_normalizado(loja):
+    cabecalho = ["DATA", "documento", "Item "]
+    loja.mesclar("analitico", "2026-10", cabecalho, [["01/10/2026", "NF 1", 1]], "Data", ("Documento", "Item"))
+    assert loja.ultima_data("analitico", "2026-10") == date(2026, 10, 1)
@@ -0,0 +1,45 @@
+from datetime import date
+
+from jornada import Jornada, SOLICITADO, GERADO, BAIXADO
+
+HOJE = date(2026, 10, 18)
+
+
+def test_retoma_as_etapas_do_mesmo_dia_e_periodo(tmp_path):
+    caminho = str(tmp_path / "jornada.json")
+    jornada = Jornada(caminho, HOJE)
+    jornada.marcar("analitico", "2026-10", SOLICITADO, conhecidos=["https://blob/antigo.xlsx"])
+    jornada.marcar("analitico", "2026-10", GERADO, href="https://blob/novo.xlsx")
+    # Outra execução no mesmo dia (ex.: depois de uma queda)
+    estado = Jornada(caminho, HOJE).estado("analitico", "2026-10")
+    assert set(estado) == {SOLICITADO, GERADO}
+    assert estado[SOLICITADO]["conhecidos"] == ["https://blob/antigo.xlsx"]
+    assert estado[GERADO]["href"] == "https://blob/novo.xlsx"
+    # Trecho incremental é outro período: não retoma o mês inteiro
+    assert Jornada(caminho, HOJE).estado("analitico", "2026-10 desde 2026-10-15") == {}
+
+
+def test_outro_dia_comeca_do_zero(tmp_path):
+    caminho = str(tmp_path / "jornada.json")
+    Jornada(caminho, HOJE).marcar("venda", "2026", GERADO, href="https://blob/venda.xlsx")
+    assert Jornada(caminho, date(2026, 10, 19)).estado("venda", "2026") == {}
+
+
+def test_concluido_e_descartado_saem_do_diario(tmp_path):
+    caminho = str(tmp_path / "jornada.json")
+    jornada = Jornada(caminho, HOJE)
+    jornada.marcar("venda", "2026", BAIXADO)
+    jornada.marcar("estoque", "2026-10-18", GERADO, href="https://blob/estoque.xlsx")
+    jornada.concluir("venda")
+    jornada.descartar("estoque")
+    relido = Jornada(caminho, HOJE)
+    assert relido.estado("venda", "2026") == {}
+    assert relido.estado("estoque", "2026-10-18") == {}
+
+
+def test_marcar_outro_periodo_recomeca_o_registro(tmp_path):
+    jornada = Jornada(str(tmp_path / "jornada.json"), HOJE)
+    jornada.marcar("analitico", "2026-10 desde 2026-10-15", SOLICITADO)
+    jornada.marcar("analitico", "2026-10", SOLICITADO)
+    assert jornada.estado("analitico", "2026-10 desde 2026-10-15") == {}
+    assert set(jornada.estado("analitico", "2026-10")) == {SOLICITADO}
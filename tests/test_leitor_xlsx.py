@@ -0,0 +1,39 @@
+from datetime import date, datetime, time
+
+import pytest
+
+from leitor_xlsx import ler_linhas, em_lotes
+
+openpyxl = pytest.importorskip("openpyxl")
+
+
+def _planilha(caminho):
+    pasta = openpyxl.Workbook()
+    planilha = pasta.active
+    planilha.append(["Relatório de vendas"])
+    planilha.append([])
+    planilha.append(["Data", "Documento", "Item", "Quantidade", "Valor", "Pago"])
+    planilha.append([datetime(2026, 10, 1, 14, 30), "NF 1", 1, 2, 10.5, True])
+    planilha.append([date(2026, 10, 2), "NF 2", 1, -1, 0.1, False])
+    planilha["H7"] = "célula solta"
+    planilha["B8"] = "André"
+    planilha["D8"] = time(8, 15)
+    pasta.save(caminho)
+
+
+def test_ler_linhas_igual_ao_openpyxl(tmp_path):
+    caminho = str(tmp_path / "vendas.xlsx")
+    _planilha(caminho)
+    esperado = list(openpyxl.load_workbook(caminho).active.iter_rows(values_only=True))
+    lidas = list(ler_linhas(caminho))
+    # openpyxl devolve todas as linhas com a largura da planilha; o leitor não completa
+    # linhas vazias nem colunas à direita
+    preenchidas = [linha for linha in esperado if any(c is not None for c in linha)]
+    assert [tuple(linha) for linha in lidas if linha] == [
+        tuple(linha[:max(i for i, c in enumerate(linha) if c is not None) + 1]) for linha in preenchidas
+    ]
+
+
+def test_em_lotes():
+    assert list(em_lotes(range(5), 2)) == [[0, 1], [2, 3], [4]]
+    assert list(em_lotes([], 2)) == []
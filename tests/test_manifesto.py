@@ -0,0 +1,60 @@
+import os
+from datetime import datetime
+
+import pytest
+
+from manifesto import Manifesto, hash_arquivo
+
+
+@pytest.fixture
+def manifesto(tmp_path):
+    manifesto = Manifesto(str(tmp_path / "manifesto.sqlite"))
+    yield manifesto
+    manifesto.fechar()
+
+
+def _arquivo(caminho, conteudo=b"planilha"):
+    caminho.write_bytes(conteudo)
+    return str(caminho)
+
+
+def test_atualizado_pela_janela_de_validade(manifesto, tmp_path):
+    arquivo = _arquivo(tmp_path / "venda.xlsx")
+    manifesto.registrar(arquivo, "venda", "2026", 8, hash_arquivo(arquivo), datetime(2026, 10, 17, 23, 0))
+    agora = datetime(2026, 10, 18, 8, 0)
+    assert not manifesto.atualizado("venda", "2026", "dia", agora)
+    assert manifesto.atualizado("venda", "2026", "mes", agora)
+    assert manifesto.atualizado("venda", "2026", "ano", agora)
+    # Outro período do mesmo tipo não vale
+    assert not manifesto.atualizado("venda", "2025", "ano", agora)
+
+
+def test_atualizado_exige_o_arquivo_com_o_mesmo_tamanho(manifesto, tmp_path):
+    arquivo = _arquivo(tmp_path / "venda.xlsx")
+    agora = datetime(2026, 10, 18, 8, 0)
+    manifesto.registrar(arquivo, "venda", "2026", 8, hash_arquivo(arquivo), agora)
+    assert manifesto.atualizado("venda", "2026", "dia", agora)
+    _arquivo(tmp_path / "venda.xlsx", b"truncada")
+    assert manifesto.atualizado("venda", "2026", "dia", agora)
+    _arquivo(tmp_path / "venda.xlsx", b"cortada")
+    assert not manifesto.atualizado("venda", "2026", "dia", agora)
+    os.remove(arquivo)
+    assert not manifesto.atualizado("venda", "2026", "dia", agora)
+
+
+def test_importar_existente_uma_vez_e_pelo_mtime(manifesto, tmp_path):
+    arquivo = _arquivo(tmp_path / "estoque.xlsx")
+    hoje = datetime.fromtimestamp(os.path.getmtime(arquivo))
+    assert manifesto.importar_existente(arquivo, "estoque", "hoje", "dia", hoje)
+    assert manifesto.hash_de(arquivo) == hash_arquivo(arquivo)
+    assert manifesto.atualizado("estoque", "hoje", "dia", hoje)
+    # Já registrado: não importa de novo
+    assert not manifesto.importar_existente(arquivo, "estoque", "hoje", "dia", hoje)
+
+
+def test_importar_existente_ignora_arquivo_antigo_ou_ausente(manifesto, tmp_path):
+    arquivo = _arquivo(tmp_path / "estoque.xlsx")
+    os.utime(arquivo, (datetime(2026, 10, 17).timestamp(),) * 2)
+    assert not manifesto.importar_existente(arquivo, "estoque", "hoje", "dia", datetime(2026, 10, 18))
+    assert manifesto.hash_de(arquivo) is None
+    assert not manifesto.importar_existente(str(tmp_path / "nao_existe.xlsx"), "estoque", "hoje", "dia")
@@ -0,0 +1,51 @@
+import json
+
+from perfil import Perfil, comparar, percentil
+
+
+def _execucao(caminho, total, etapas):
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump({"inicio": "2026-10-18T08:00:00", "total": total, "etapas": etapas}, f)
+    return str(caminho)
+
+
+def _etapa(relatorio, nome, parede, espera=0.0, tentativas=0):
+    return {"relatorio": relatorio, "etapa": nome, "parede": parede, "espera": espera, "tentativas": tentativas}
+
+
+def test_percentil():
+    assert percentil([3, 1, 2, 4], 50) == 2
+    assert percentil([3, 1, 2, 4], 95) == 4
+    assert percentil([7], 50) == 7
+
+
+def test_comparar_soma_etapas_repetidas_e_ordena_pelo_p95(tmp_path):
+    arquivos = [
+        _execucao(tmp_path / "perfil_1.json", 100, [
+            _etapa(None, "login", 5.0, 4.0, 1),
+            _etapa("venda", "aguardar_pronto", 30.0, 28.0),
+            _etapa("venda", "aguardar_pronto", 10.0, 9.0),
+        ]),
+        _execucao(tmp_path / "perfil_2.json", 80, [
+            _etapa(None, "login", 7.0, 6.0, 3),
+            _etapa("venda", "aguardar_pronto", 20.0, 19.0),
+        ]),
+    ]
+    linhas, totais = comparar(arquivos)
+    assert totais == [100, 80]
+    assert linhas == [
+        ("venda", "aguardar_pronto", 2, 20.0, 40.0, 19.0, 37.0, 0.0),
+        ("geral", "login", 2, 5.0, 7.0, 4.0, 6.0, 2.0),
+    ]
+
+
+def test_perfil_salvo_volta_na_comparacao(tmp_path):
+    perfil = Perfil()
+    with perfil.etapa("estoque", "baixar"):
+        perfil.espera(0.5)
+        perfil.tentativa()
+    perfil.registrar("venda", "aguardar_pronto", 12.0, 11.0, 4)
+    linhas, _ = comparar([perfil.salvar(str(tmp_path / "perfil.json"))])
+    por_etapa = {(r, e): (esperas, tentativas) for r, e, _, _, _, esperas, _, tentativas in linhas}
+    assert por_etapa[("estoque", "baixar")] == (0.5, 1.0)
+    assert por_etapa[("venda", "aguardar_pronto")] == (11.0, 4.0)
@@ -0,0 +1,83 @@
+import pytest
+
+from planilhas import validar_planilha, separar_cabecalho, gravar_colunar, indice_coluna, nome_coluna, PlanilhaInvalida
+
+openpyxl = pytest.importorskip("openpyxl")
+
+
+def _planilha(caminho, linhas):
+    pasta = openpyxl.Workbook()
+    for linha in linhas:
+        pasta.active.append(linha)
+    pasta.save(caminho)
+    return str(caminho)
+
+
+def test_nome_coluna():
+    assert nome_coluna("Cód. Vendedor") == "cod_vendedor"
+    assert nome_coluna("2º Item") == "c_2o_item"
+    assert nome_coluna("***") == "coluna"
+
+
+def test_colunas_pelo_nome_normalizado(tmp_path):
+    caminho = _planilha(tmp_path / "analitico.xlsx", [["DATA ", "Documento", "ítem"], ["01/10/2026", "NF 1", 1]])
+    assert validar_planilha(caminho, colunas=("Data", "Documento", "Item")).quantidade == 1
+    assert indice_coluna(["DATA ", "Documento", "ítem"], "Item") == 2
+    with pytest.raises(PlanilhaInvalida, match="Vendedor"):
+        validar_planilha(caminho, colunas=("Vendedor",))
+
+
+def test_minimo_de_linhas(tmp_path):
+    caminho = _planilha(tmp_path / "vazio.xlsx", [["Vendedor", "Valor"], [None, None]])
+    assert validar_planilha(caminho).quantidade == 0
+    with pytest.raises(PlanilhaInvalida, match="mínimo 1"):
+        validar_planilha(caminho, min_linhas=1)
+
+
+def test_arquivo_truncado(tmp_path):
+    caminho = _planilha(tmp_path / "venda.xlsx", [["Vendedor", "Valor"], ["Ana", 1.0]])
+    with open(caminho, "rb") as f:
+        conteudo = f.read()
+    with open(caminho, "wb") as f:
+        f.write(conteudo[:len(conteudo) // 2])
+    with pytest.raises(PlanilhaInvalida, match="ilegível"):
+        validar_planilha(caminho)
+
+
+TITULO = ["Relatório de Vendas Analítico", "Empresa: Loja X"]
+CABECALHO = ["Data", "Documento", "Item", "Valor"]
+DADOS = [["01/10/2026", "NF 1", 1, 10.0], ["02/10/2026", "NF 2", 1, 20.0]]
+
+
+def test_titulo_com_dois_textos_nao_vira_cabecalho(tmp_path):
+    caminho = _planilha(tmp_path / "analitico.xlsx", [TITULO, [], CABECALHO] + DADOS)
+    leitura = validar_planilha(caminho, colunas=("Valor",))
+    assert (leitura.cabecalho, leitura.quantidade) == (CABECALHO, 2)
+    assert leitura.tipos[1] == {str}
+    cabecalho, linhas = separar_cabecalho([TITULO, [], CABECALHO] + DADOS)
+    assert cabecalho == CABECALHO
+    assert list(linhas) == DADOS
+
+
+def test_cabecalho_pelas_colunas_exigidas():
+    # Cabeçalho seguido de uma linha só de textos mais larga (ex.: dados todos em texto)
+    linhas = [TITULO, ["Data", "Documento"], ["01/10/2026", "NF 1", "obs", "x"]]
+    cabecalho, restantes = separar_cabecalho(linhas, ("data", "documento"))
+    assert cabecalho == ["Data", "Documento"]
+    assert list(restantes) == [["01/10/2026", "NF 1", "obs", "x"]]
+
+
+def test_sem_cabecalho():
+    cabecalho, linhas = separar_cabecalho([["Relatório"], [1, 2]])
+    assert cabecalho is None
+    assert list(linhas) == [["Relatório"], [1, 2]]
+
+
+def test_colunar_com_todas_as_colunas_e_excedentes_avisados(tmp_path, capsys):
+    pq = pytest.importorskip("pyarrow.parquet")
+    caminho = _planilha(tmp_path / "analitico.xlsx", [TITULO, CABECALHO] + DADOS + [["03/10/2026", "NF 3", 1, 5.0, "solto"]])
+    destino = gravar_colunar(caminho, "sha")
+    tabela = pq.read_table(destino)
+    assert tabela.column_names == CABECALHO
+    assert tabela.num_rows == 3
+    assert "1 linhas com valores à direita do cabeçalho" in capsys.readouterr().out
@@ -0,0 +1,53 @@
+import pytest
+
+import prontidao
+from prontidao import HistoricoProntidao, Prontidao, proxima_verificacao, ATRASO_MIN, ATRASO_MAX
+
+
+def _historico(tmp_path):
+    return HistoricoProntidao(str(tmp_path / "historico.json"))
+
+
+def test_backoff_cresce_ate_o_maximo(tmp_path, monkeypatch):
+    monkeypatch.setattr(prontidao.random, "uniform", lambda a, b: 1.0)
+    espera = Prontidao("venda", 600, _historico(tmp_path))
+    agora = espera.inicio
+    intervalos = []
+    for _ in range(12):
+        espera.nao_pronto(agora)
+        intervalos.append(round(espera.proxima - agora, 3))
+        agora = espera.proxima
+    assert intervalos[0] == ATRASO_MIN
+    assert intervalos == sorted(intervalos)
+    assert intervalos[-1] == ATRASO_MAX
+    assert espera.tentativas == 12
+
+
+def test_proxima_verificacao_nao_passa_do_prazo(tmp_path):
+    espera = Prontidao("venda", 5, _historico(tmp_path))
+    for _ in range(10):
+        espera.nao_pronto(espera.proxima)
+    assert espera.proxima == espera.limite
+    assert espera.vencida(espera.limite)
+    assert not espera.vencida(espera.limite - 0.01)
+
+
+def test_historico_define_a_primeira_verificacao(tmp_path):
+    historico = _historico(tmp_path)
+    assert historico.atraso_inicial("analitico") == ATRASO_MIN
+    for duracao in (40, 50, 60):
+        historico.registrar("analitico", duracao)
+    historico.salvar()
+    historico = _historico(tmp_path)
+    assert historico.atraso_inicial("analitico") == 40
+    espera = Prontidao("analitico", 600, historico)
+    assert not espera.deve_verificar(espera.inicio + 39)
+    assert espera.deve_verificar(espera.inicio + 40)
+    assert proxima_verificacao([espera, Prontidao("venda", 600, historico)]) < espera.proxima
+
+
+def test_pronto_registra_a_duracao(tmp_path):
+    historico = _historico(tmp_path)
+    espera = Prontidao("estoque", 600, historico)
+    assert espera.pronto(espera.inicio + 12.344) == pytest.approx(12.344)
+    assert historico.duracoes["estoque"] == [12.34]
@@ -0,0 +1,64 @@
+import hashlib
+import os
+import shutil
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("selenium")
+openpyxl = pytest.importorskip("openpyxl")
+pq = pytest.importorskip("pyarrow.parquet")
+
+import planilhas  # noqa: E402
+from armazem import Armazem  # noqa: E402
+from incremental import LojaMensal  # noqa: E402
+from jornada import Jornada  # noqa: E402
+from manifesto import Manifesto  # noqa: E402
+from relatorios import RELATORIOS, referencias, salvar, caminho_publicado  # noqa: E402
+
+
+def _baixar(origem):
+    # Mesmo contrato de downloads.baixar_arquivo, copiando um arquivo local
+    def baixar(url, destino, hash_atual=None, validar=None):
+        temporario = destino + ".part"
+        shutil.copy(origem, temporario)
+        if validar is not None:
+            validar(temporario)
+        os.replace(temporario, destino)
+        with open(destino, "rb") as f:
+            return os.path.getsize(destino), hashlib.sha256(f.read()).hexdigest(), True
+    return baixar
+
+
+def test_salvar_le_o_analitico_duas_vezes(tmp_path, monkeypatch):
+    origem = str(tmp_path / "origem.xlsx")
+    pasta = openpyxl.Workbook()
+    pasta.active.append(["Relatório de Vendas Analítico", "Empresa: Loja X"])
+    pasta.active.append(["Data", "Documento", "Item", "Vendedor", "Valor"])
+    for i in range(1, 11):
+        pasta.active.append([datetime(2026, 10, i), f"NF {i}", 1, "Ana", 10.0 * i])
+    pasta.save(origem)
+
+    leituras = []
+    ler_linhas = planilhas.ler_linhas
+    monkeypatch.setattr(planilhas, "ler_linhas", lambda caminho: leituras.append(caminho) or ler_linhas(caminho))
+
+    espec = next(e for e in RELATORIOS if e.chave == "analitico").resolver(referencias(datetime(2026, 10, 18)))
+    pastas = {"analitico": str(tmp_path / "analitico")}
+    os.makedirs(pastas["analitico"])
+    manifesto = Manifesto(str(tmp_path / "manifesto.sqlite"))
+    loja = LojaMensal(str(tmp_path / "mensal.sqlite"))
+    armazem = Armazem(str(tmp_path / "armazem.sqlite"), "Loja X")
+    try:
+        salvar(None, manifesto, Jornada(str(tmp_path / "jornada.json")), espec, pastas, "https://blob/a.xlsx",
+               baixar=_baixar(origem), loja=loja, armazem=armazem)
+        publicado = caminho_publicado(espec, pastas)
+        # Validação (antes de publicar) + uma leitura para cópia colunar, semente e armazém
+        assert len(leituras) == 2
+        assert pq.read_table(os.path.splitext(publicado)[0] + ".parquet").num_rows == 10
+        assert loja.ultima_data("analitico", espec.periodo).isoformat() == "2026-10-10"
+        assert armazem.consultar("SELECT COUNT(*), SUM(valor) FROM analitico")[1] == [(10, 550.0)]
+    finally:
+        manifesto.fechar()
+        loja.fechar()
+        armazem.fechar()
@@ -0,0 +1,81 @@
+import pytest
+
+pytest.importorskip("selenium")
+
+from selenium.common.exceptions import WebDriverException  # noqa: E402
+
+import retentativas  # noqa: E402
+from retentativas import repetir, Disjuntor, Politica, SessaoQuebrada  # noqa: E402
+
+SEM_ESPERA = Politica(tentativas=3, espera=0)
+
+
+class Navegador:
+    def __init__(self, vivo=True):
+        self.vivo = vivo
+
+    def execute_script(self, script):
+        if not self.vivo:
+            raise WebDriverException("chrome not reachable")
+        return 1
+
+
+class Status:
+    def __init__(self):
+        self.erros = []
+
+    def erro(self, relatorio, etapa, erro=None, detalhe=None):
+        self.erros.append((etapa, detalhe))
+
+
+@pytest.fixture(autouse=True)
+def sem_sleep(monkeypatch):
+    monkeypatch.setattr(retentativas, "sleep", lambda segundos: None)
+
+
+def _tentativas(*resultados):
+    resultados = list(resultados)
+    chamadas = []
+
+    def tentar():
+        chamadas.append(1)
+        resultado = resultados.pop(0)
+        if isinstance(resultado, Exception):
+            raise resultado
+        return resultado
+    return tentar, chamadas
+
+
+def test_repete_ate_conseguir():
+    tentar, chamadas = _tentativas(False, WebDriverException("timeout"), True)
+    disjuntor = Disjuntor()
+    assert repetir(Navegador(), "login", tentar, Status(), SEM_ESPERA, disjuntor)
+    assert len(chamadas) == 3
+    assert not disjuntor.aberto("login")
+
+
+def test_disjuntor_abre_apos_falhas_seguidas():
+    disjuntor = Disjuntor(limite=2)
+    status = Status()
+    for _ in range(2):
+        tentar, _ = _tentativas(False, False, False)
+        assert not repetir(Navegador(), "trocar_empresa", tentar, status, SEM_ESPERA, disjuntor)
+    tentar, chamadas = _tentativas(True)
+    assert not repetir(Navegador(), "trocar_empresa", tentar, status, SEM_ESPERA, disjuntor)
+    assert chamadas == []
+    assert "circuito aberto" in status.erros[-1][1]
+    # Outra etapa não é afetada
+    assert repetir(Navegador(), "login", tentar, status, SEM_ESPERA, disjuntor)
+
+
+def test_navegador_morto_vira_sessao_quebrada():
+    tentar, chamadas = _tentativas(WebDriverException("chrome not reachable"), True)
+    with pytest.raises(SessaoQuebrada):
+        repetir(Navegador(vivo=False), "login", tentar, Status(), SEM_ESPERA, Disjuntor())
+    assert len(chamadas) == 1
+
+
+def test_recuperar_falho_conta_como_tentativa():
+    tentar, chamadas = _tentativas(False, True)
+    assert not repetir(Navegador(), "selecionar_empresa", tentar, Status(), SEM_ESPERA, Disjuntor(), recuperar=lambda: False)
+    assert len(chamadas) == 1
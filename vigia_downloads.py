@@ -0,0 +1,114 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+from time import monotonic, sleep
+
+from downloads import nome_arquivo_url, TAMANHO_BLOCO
+
+# Download pelo navegador, para links que a sessão HTTP não consegue baixar (401/403).
+# Cada execução usa uma pasta de downloads só sua (nada de arquivos do usuário) e espera
+# pelo nome exato do link clicado: com watchdog, por eventos do sistema de arquivos;
+# sem ele, com um stat do próprio arquivo a cada 0,2 s (sem varrer a pasta).
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    Observer = None
+
+INTERVALO_POLL = 0.2
+TIMEOUT_DOWNLOAD = 120
+
+
+if Observer is not None:
+    class _Esperado(FileSystemEventHandler):
+        def __init__(self, caminho):
+            self.caminho = os.path.abspath(caminho)
+            self.pronto = threading.Event()
+
+        def _conferir(self, caminho):
+            if os.path.abspath(caminho) == self.caminho:
+                self.pronto.set()
+
+        # O Chrome grava em ".crdownload" e renomeia para o nome final ao terminar
+        def on_moved(self, evento):
+            self._conferir(evento.dest_path)
+
+        def on_created(self, evento):
+            self._conferir(evento.src_path)
+
+
+class VigiaDownloads:
+    def __init__(self, driver, pasta=None):
+        self.driver = driver
+        self.pasta = pasta or tempfile.mkdtemp(prefix="myrp_downloads_")
+        # Vale para todas as abas: os downloads desta execução caem só nesta pasta
+        driver.execute_cdp_cmd("Browser.setDownloadBehavior", {"behavior": "allow", "downloadPath": self.pasta})
+
+    def aguardar(self, nome, timeout=TIMEOUT_DOWNLOAD):
+        caminho = os.path.join(self.pasta, nome)
+        inicio = monotonic()
+        if Observer is not None:
+            esperado = _Esperado(caminho)
+            observador = Observer()
+            observador.schedule(esperado, self.pasta, recursive=False)
+            observador.start()
+            try:
+                # O arquivo pode ter terminado antes do observador começar
+                if not os.path.exists(caminho):
+                    esperado.pronto.wait(timeout)
+            finally:
+                observador.stop()
+                observador.join()
+        else:
+            while not os.path.exists(caminho) and monotonic() - inicio < timeout:
+                sleep(INTERVALO_POLL)
+        if not os.path.exists(caminho):
+            raise TimeoutError(f"download de {nome} não terminou em {timeout}s")
+        print(f"[download navegador] {nome}: {monotonic() - inicio:.2f}s")
+        return caminho
+
+    def baixar(self, url, destino, hash_atual=None, validar=None, timeout=TIMEOUT_DOWNLOAD):
+        # Mesmo contrato de downloads.baixar_arquivo: (bytes, sha256, gravado)
+        nome = nome_arquivo_url(url)
+        self.driver.execute_script(
+            "var a = document.createElement('a'); a.href = arguments[0]; a.download = arguments[1];"
+            "document.body.appendChild(a); a.click(); a.remove();",
+            url, nome,
+        )
+        baixado = self.aguardar(nome, timeout)
+        sha = hashlib.sha256()
+        with open(baixado, "rb") as f:
+            for bloco in iter(lambda: f.read(TAMANHO_BLOCO), b""):
+                sha.update(bloco)
+        sha256 = sha.hexdigest()
+        tamanho = os.path.getsize(baixado)
+        if tamanho == 0:
+            os.remove(baixado)
+            raise IOError("download vazio")
+        if hash_atual == sha256 and os.path.exists(destino):
+            os.remove(baixado)
+            return tamanho, sha256, False
+        if validar is not None:
+            try:
+                validar(baixado)
+            except Exception:
+                os.remove(baixado)
+                raise
+        # A pasta temporária pode estar em outro volume: passa por um temporário ao lado do destino
+        fd, temporario = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(destino)), prefix=".", suffix=".part")
+        os.close(fd)
+        try:
+            shutil.move(baixado, temporario)
+            os.chmod(temporario, 0o644)
+            os.replace(temporario, destino)
+        except BaseException:
+            if os.path.exists(temporario):
+                os.remove(temporario)
+            raise
+        return tamanho, sha256, True
+
+    def limpar(self):
+        shutil.rmtree(self.pasta, ignore_errors=True)